@@ -0,0 +1,122 @@
+import random
+from typing import List
+
+SIZES = [
+    # width, height, diamonds, bots, teleports
+    (15, 15, 10, 2, 2),
+    (15, 15, 30, 6, 2),
+    (30, 30, 120, 12, 4),
+    (60, 60, 500, 24, 8),
+]
+
+
+def _free_cell(rng: random.Random, width: int, height: int, taken: set) -> dict:
+    while True:
+        cell = (rng.randrange(width), rng.randrange(height))
+        if cell not in taken:
+            taken.add(cell)
+            return {"x": cell[0], "y": cell[1]}
+
+
+def make_board_payload(
+    width: int = 15,
+    height: int = 15,
+    diamonds: int = 20,
+    bots: int = 4,
+    teleports: int = 2,
+    seed: int = 0,
+) -> dict:
+    """
+    Board payload shaped like the JSON the server sends, with camelCase keys
+    """
+    rng = random.Random(seed)
+    taken = set()
+    game_objects: List[dict] = []
+    object_id = 1
+
+    for i in range(bots):
+        base = _free_cell(rng, width, height, taken)
+        name = "bot{}".format(i)
+        game_objects.append(
+            {
+                "id": object_id,
+                "position": base,
+                "type": "BaseGameObject",
+                "properties": {"name": name},
+            }
+        )
+        object_id += 1
+        game_objects.append(
+            {
+                "id": object_id,
+                "position": _free_cell(rng, width, height, taken),
+                "type": "BotGameObject",
+                "properties": {
+                    "diamonds": rng.randrange(6),
+                    "score": rng.randrange(40),
+                    "name": name,
+                    "inventorySize": 5,
+                    "canTackle": True,
+                    "millisecondsLeft": rng.randrange(60000),
+                    "timeJoined": "2024-01-01T00:00:00.000Z",
+                    "base": dict(base),
+                },
+            }
+        )
+        object_id += 1
+
+    for _ in range(diamonds):
+        game_objects.append(
+            {
+                "id": object_id,
+                "position": _free_cell(rng, width, height, taken),
+                "type": "DiamondGameObject",
+                "properties": {"points": rng.choice((1, 1, 1, 2))},
+            }
+        )
+        object_id += 1
+
+    for pair in range(teleports // 2):
+        for _ in range(2):
+            game_objects.append(
+                {
+                    "id": object_id,
+                    "position": _free_cell(rng, width, height, taken),
+                    "type": "TeleportGameObject",
+                    "properties": {"pairId": str(pair)},
+                }
+            )
+            object_id += 1
+
+    game_objects.append(
+        {
+            "id": object_id,
+            "position": _free_cell(rng, width, height, taken),
+            "type": "DiamondButtonGameObject",
+            "properties": {},
+        }
+    )
+
+    return {
+        "id": 1,
+        "width": width,
+        "height": height,
+        "minimumDelayBetweenMoves": 100,
+        "features": [
+            {
+                "name": "DiamondButtonProvider",
+                "config": {"seconds": 60, "inventorySize": 5, "canTackle": True},
+            },
+            {
+                "name": "DiamondProvider",
+                "config": {
+                    "generationRatio": 0.1,
+                    "minRatioForGeneration": 0.01,
+                    "redRatio": 0.2,
+                },
+            },
+            {"name": "TeleportProvider", "config": {"pairs": teleports // 2}},
+            {"name": "BaseProvider", "config": None},
+        ],
+        "gameObjects": game_objects,
+    }
@@ -0,0 +1,47 @@
+"""
+Per-board decode time of the generic path (decode + dacite) against
+game.decoder.decode_board.
+
+    python -m benchmarks.decode_board
+"""
+from timeit import Timer
+
+from dacite import from_dict
+
+from benchmarks.boards import SIZES, make_board_payload
+from decode import decode
+from game.decoder import decode_board
+from game.models import Board
+
+
+def _per_call(func, payload) -> float:
+    timer = Timer(lambda: func(payload))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=5, number=number)) / number
+
+
+def main():
+    print(
+        "{:>9} {:>8} {:>14} {:>14} {:>8}".format(
+            "board", "objects", "dacite (us)", "decoder (us)", "speedup"
+        )
+    )
+    for width, height, diamonds, bots, teleports in SIZES:
+        payload = make_board_payload(width, height, diamonds, bots, teleports)
+        assert from_dict(Board, decode(payload)) == decode_board(payload)
+
+        generic = _per_call(lambda data: from_dict(Board, decode(data)), payload)
+        fast = _per_call(decode_board, payload)
+        print(
+            "{:>9} {:>8} {:>14.1f} {:>14.1f} {:>7.1f}x".format(
+                "{}x{}".format(width, height),
+                len(payload["gameObjects"]),
+                generic * 1e6,
+                fast * 1e6,
+                generic / fast,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
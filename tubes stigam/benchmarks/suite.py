@@ -0,0 +1,252 @@
+"""
+Latency percentiles and allocations of the hot paths of a tick, on
+synthetic boards of growing size, with a stored baseline to compare
+against.
+
+    python -m benchmarks.suite                 run and print
+    python -m benchmarks.suite --save          run and store as the baseline
+    python -m benchmarks.suite --check         run and fail on regressions
+"""
+import argparse
+import copy
+import itertools
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import asdict, dataclass
+from time import perf_counter_ns
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dacite import from_dict
+
+from benchmarks.boards import SIZES, make_board_payload
+from decode import decode
+from game.board_state import BoardStore
+from game.decoder import LazyBoard, decode_board
+from game.logic.stigam import Stigam
+from game.models import Board, Bot
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# A case regresses when its median is this much slower than the baseline
+DEFAULT_TOLERANCE = 0.25
+# Every sample runs the case often enough to take at least this long
+SAMPLE_NS = 50_000
+
+
+@dataclass
+class Result:
+    case: str
+    board: str
+    p50_us: float
+    p90_us: float
+    p99_us: float
+    # Peak memory allocated during one call, and blocks still held after it
+    peak_bytes: int
+    retained_blocks: int
+
+    @property
+    def key(self) -> str:
+        return "{} {}".format(self.case, self.board)
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def _measure(case: str, board: str, func: Callable[[], object], samples: int) -> Result:
+    func()
+    # Cheap calls are timed in batches so the clock resolution does not matter
+    started = perf_counter_ns()
+    func()
+    batch = max(1, SAMPLE_NS // max(1, perf_counter_ns() - started))
+
+    times = []
+    for _ in range(samples):
+        started = perf_counter_ns()
+        for _ in range(batch):
+            func()
+        times.append((perf_counter_ns() - started) / batch / 1000)
+    times.sort()
+
+    tracemalloc.start()
+    before_blocks = len(tracemalloc.take_snapshot().traces)
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    retained = len(tracemalloc.take_snapshot().traces) - before_blocks
+    tracemalloc.stop()
+    del result
+
+    return Result(
+        case=case,
+        board=board,
+        p50_us=round(_percentile(times, 50), 3),
+        p90_us=round(_percentile(times, 90), 3),
+        p99_us=round(_percentile(times, 99), 3),
+        peak_bytes=peak - before,
+        retained_blocks=max(0, retained),
+    )
+
+
+def _lazy_tick(payload: dict, bot: Bot) -> Tuple[int, int]:
+    board = LazyBoard(payload)
+    return Stigam().next_move(board.get_bot(bot), board)
+
+
+def _ticks(payload: dict, count: int = 8) -> List[dict]:
+    """
+    Payloads of consecutive ticks: every bot's timer runs down and two bots
+    step back and forth, the rest of the board stays the same
+    """
+    ticks = []
+    for tick in range(count):
+        step = copy.deepcopy(payload)
+        bots = [obj for obj in step["gameObjects"] if obj["type"] == "BotGameObject"]
+        for i, obj in enumerate(bots):
+            obj["properties"]["millisecondsLeft"] -= 100 * tick
+            if i < 2 and tick % 2:
+                x = obj["position"]["x"]
+                obj["position"]["x"] = x + 1 if x + 1 < payload["width"] else x - 1
+        ticks.append(step)
+    return ticks
+
+
+def _cases(payload: dict) -> Dict[str, Callable[[], object]]:
+    board = decode_board(payload)
+    board_bot = board.bots[0]
+    bot = Bot(name=board_bot.properties.name, email="", id="")
+    decoded = decode(payload)
+    dx, dy = next(
+        (dx, dy)
+        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]
+        if 0 <= board_bot.position.x + dx < board.width
+        and 0 <= board_bot.position.y + dy < board.height
+    )
+    steady = Stigam()
+    store = BoardStore()
+    ticks = itertools.cycle(_ticks(payload))
+    store.decode(next(ticks))
+
+    return {
+        "decode.decode": lambda: decode(payload),
+        "dacite.from_dict": lambda: from_dict(Board, decoded),
+        "decode_board": lambda: decode_board(payload),
+        # Next tick: only the bots that changed are decoded again
+        "BoardStore.decode": lambda: store.decode(next(ticks)),
+        "Board.get_bot": lambda: board.get_bot(bot),
+        "Board.is_valid_move": lambda: board.is_valid_move(board_bot.position, dx, dy),
+        # Same board every tick: distance fields and route stay cached
+        "Stigam.next_move": lambda: steady.next_move(board_bot, board),
+        # First tick of a new logic on a new board
+        "Stigam.next_move cold": lambda: Stigam().next_move(board_bot, decode_board(payload)),
+        # The same on a LazyBoard, decoding only what the logic reads
+        "LazyBoard cold": lambda: _lazy_tick(payload, bot),
+    }
+
+
+def run(samples: int = 200, sizes=SIZES) -> List[Result]:
+    results = []
+    for width, height, diamonds, bots, teleports in sizes:
+        payload = make_board_payload(width, height, diamonds, bots, teleports)
+        board = "{}x{}/{}".format(width, height, len(payload["gameObjects"]))
+        for case, func in _cases(payload).items():
+            results.append(_measure(case, board, func, samples))
+    return results
+
+
+def load_baseline(path: str = BASELINE) -> Dict[str, Result]:
+    with open(path) as f:
+        data = json.load(f)
+    results = [Result(**item) for item in data["results"]]
+    return {result.key: result for result in results}
+
+
+def save_baseline(results: List[Result], path: str = BASELINE):
+    with open(path, "w") as f:
+        json.dump({"results": [asdict(r) for r in results]}, f, indent=2)
+        f.write("\n")
+
+
+def regressions(
+    results: List[Result], baseline: Dict[str, Result], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """
+    Cases whose median got slower than the baseline by more than tolerance
+    :return: list of messages, empty when nothing regressed
+    """
+    messages = []
+    for result in results:
+        base = baseline.get(result.key)
+        if base is None:
+            continue
+        if result.p50_us > base.p50_us * (1 + tolerance):
+            messages.append(
+                "{}: {:.1f}us, baseline {:.1f}us (+{:.0%})".format(
+                    result.key, result.p50_us, base.p50_us, result.p50_us / base.p50_us - 1
+                )
+            )
+    return messages
+
+
+def print_results(results: List[Result], baseline: Optional[Dict[str, Result]] = None):
+    print(
+        "{:<24} {:>13} {:>10} {:>10} {:>10} {:>10} {:>8} {:>9}".format(
+            "case", "board/objects", "p50 (us)", "p90 (us)", "p99 (us)", "peak (B)", "blocks", "vs base"
+        )
+    )
+    for result in results:
+        base = baseline.get(result.key) if baseline else None
+        change = "{:+.0%}".format(result.p50_us / base.p50_us - 1) if base else ""
+        print(
+            "{:<24} {:>13} {:>10.2f} {:>10.2f} {:>10.2f} {:>10} {:>8} {:>9}".format(
+                result.case,
+                result.board,
+                result.p50_us,
+                result.p90_us,
+                result.p99_us,
+                result.peak_bytes,
+                result.retained_blocks,
+                change,
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths of a tick")
+    parser.add_argument("--samples", default=200, type=int, help="Samples per case")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="Store the results as the baseline")
+    parser.add_argument(
+        "--check", action="store_true", help="Exit with an error when a case regressed"
+    )
+    parser.add_argument(
+        "--tolerance",
+        default=DEFAULT_TOLERANCE,
+        type=float,
+        help="Allowed slowdown of the median before it counts as a regression. Default: {}".format(
+            DEFAULT_TOLERANCE
+        ),
+    )
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline) if os.path.exists(args.baseline) else None
+    results = run(args.samples)
+    print_results(results, baseline)
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print("Baseline stored in {}".format(args.baseline))
+    if args.check:
+        if baseline is None:
+            print("No baseline to check against, run with --save first")
+            sys.exit(1)
+        failed = regressions(results, baseline, args.tolerance)
+        for message in failed:
+            print("Regression: " + message)
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
 import re
+from functools import lru_cache
+
+FIRST_CAP_PATTERN = re.compile("(.)([A-Z][a-z]+)")
+ALL_CAP_PATTERN = re.compile("([a-z0-9])([A-Z])")
+KEY_CACHE_SIZE = 1024
 
 
 def _unpack(data):
@@ -7,14 +12,16 @@ def _unpack(data):
     return data
 
 
-def _snake_case(value):
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def snake_case(value):
     """
-    Convert camel case string to snake case
+    Convert camel case string to snake case. Results are cached, since the
+    server only ever sends a handful of different keys
     :param value: string
     :return: string
     """
-    first_underscore = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", value)
-    return re.sub("([a-z0-9])([A-Z])", r"\1_\2", first_underscore).lower()
+    first_underscore = FIRST_CAP_PATTERN.sub(r"\1_\2", value)
+    return ALL_CAP_PATTERN.sub(r"\1_\2", first_underscore).lower()
 
 
 def _keys_to_snake_case(content):
@@ -23,33 +30,69 @@ def _keys_to_snake_case(content):
     :param content: dict
     :return: dict
     """
-    return {_snake_case(key): value for key, value in content.items()}
+    return {snake_case(key): value for key, value in content.items()}
+
+
+def _decode_keys_iterative(data):
+    """
+    Same as decode_keys, but walks the tree with an explicit stack and builds
+    a single new dict per input dict
+    :param data: dict
+    :return: dict
+    """
+    root = {}
+    stack = [(data, root)]
+    while stack:
+        source, target = stack.pop()
+        for key, value in source.items():
+            key = snake_case(key)
+            if isinstance(value, dict):
+                child = {}
+                stack.append((value, child))
+                target[key] = child
+            elif isinstance(value, list) and len(value) > 0:
+                items = []
+                for val in value:
+                    if isinstance(val, dict):
+                        child = {}
+                        stack.append((val, child))
+                        items.append(child)
+                    else:
+                        items.append(val)
+                target[key] = items
+            else:
+                target[key] = value
+    return root
 
 
-def decode_keys(data):
+def decode_keys(data, iterative=True):
     """
     Convert all keys for given dict/list to snake case recursively
     :param data: dict
+    :param iterative: walk the tree without recursion, the faster way
     :return: dict
     """
+    if iterative:
+        return _decode_keys_iterative(data)
+
     formatted = {}
     for key, value in _unpack(_keys_to_snake_case(data)):
         if isinstance(value, dict):
-            formatted[key] = decode_keys(value)
+            formatted[key] = decode_keys(value, False)
         elif isinstance(value, list) and len(value) > 0:
             formatted[key] = []
             for _, val in enumerate(value):
-                formatted[key].append(decode_keys(val))
+                formatted[key].append(decode_keys(val, False))
         else:
             formatted[key] = value
     return formatted
 
 
-def decode(data):
+def decode(data, iterative=True):
     if isinstance(data, dict):
-        return decode_keys(data)
+        return decode_keys(data, iterative)
 
     formatted = []
     for item in data:
-        formatted.append(decode_keys(item))
+        formatted.append(decode_keys(item, iterative))
     return formatted
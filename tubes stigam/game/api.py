@@ -1,37 +1,142 @@
 import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+from time import perf_counter
+from typing import Callable, List, Optional, Tuple, Union
 
 import requests
-from colorama import Back, Fore, Style, init
 from dacite import from_dict
 from decode import decode
+from game.decoder import decode_board
+from game.log import Redacted
 from game.models import Board, Bot
+from game.telemetry import RequestTiming
 from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_RETRIES = 3
+
+logger = logging.getLogger(__name__)
+
+# Timing of the last request awaited in the current task, see AsyncApi
+_last_timing: ContextVar[Optional[RequestTiming]] = ContextVar("last_timing", default=None)
+
+
+class MoveTooFastError(Exception):
+    """
+    Raised when the server rejects a move because it arrived before the
+    board's minimum delay between moves had passed
+    """
+
+
+def create_session(
+    pool_size: int = DEFAULT_POOL_SIZE, retries: int = DEFAULT_RETRIES
+) -> requests.Session:
+    """
+    Create a keep-alive session with a connection pool of the given size.
+    Requests that fail to connect, or whose connection is reset, are retried
+    up to `retries` times. POSTs are only retried when the request never
+    reached the server, so a move is never sent twice.
+    :param pool_size: int
+    :param retries: int
+    :return: requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=0,
+        backoff_factor=0.05,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.headers.update({"Content-Type": "application/json"})
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
 @dataclass
 class Api:
     url: str
+    session: Optional[requests.Session] = None
+    pool_size: int = DEFAULT_POOL_SIZE
+    timeout: float = DEFAULT_TIMEOUT
+    retries: int = DEFAULT_RETRIES
+    # Builds a Board from the JSON of a board, e.g. BoardStore().decode
+    board_decoder: Callable[[dict], Board] = decode_board
+
+    def __post_init__(self):
+        if self.session is None:
+            self.session = create_session(self.pool_size, self.retries)
+        self._local = threading.local()
+
+    @property
+    def last_timing(self) -> Optional[RequestTiming]:
+        """
+        Timing of the last request sent from the current thread
+        """
+        return getattr(self._local, "timing", None)
+
+    def _decode_timed(self, decoder, data):
+        started = perf_counter()
+        result = decoder(data)
+        if self.last_timing is not None:
+            self.last_timing.decode += perf_counter() - started
+        return result
+
+    def _decode_boards(self, data: List[dict]) -> List[Board]:
+        return [self.board_decoder(board) for board in data]
+
+    def share(self, url: Optional[str] = None) -> "Api":
+        """
+        Create another client that reuses this client's connection pool
+        :param url: base url of the new client, defaults to this client's url
+        :return: Api
+        """
+        return Api(
+            url or self.url,
+            session=self.session,
+            pool_size=self.pool_size,
+            timeout=self.timeout,
+            retries=self.retries,
+            board_decoder=self.board_decoder,
+        )
+
+    def close(self):
+        self.session.close()
 
     def _get_url(self, endpoint: str) -> str:
         return "{}{}".format(self.url, endpoint)
 
     def _req(self, endpoint: str, method: str, body: dict) -> Response:
-        print(
-            ">>> {} {} {}".format(
-                Style.BRIGHT + method.upper() + Style.RESET_ALL,
-                Fore.GREEN + endpoint + Style.RESET_ALL,
-                body,
-            )
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(">>> %s %s %s", method.upper(), endpoint, Redacted(body))
+        started = perf_counter()
+        res = self.session.request(
+            method,
+            self._get_url(endpoint),
+            data=json.dumps(body),
+            timeout=self.timeout,
+        )
+        self._local.timing = RequestTiming(
+            endpoint, res.status_code, http=perf_counter() - started
         )
-        func = getattr(requests, method)
-        headers = {"Content-Type": "application/json"}
-        res = func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
         if res.status_code == 200:
-            print("<<< {} OK".format(res.status_code))
-        else:
-            print("<<< {} {}".format(res.status_code, res.text))
+            if debug:
+                logger.debug("<<< %s OK", res.status_code)
+        elif logger.isEnabledFor(logging.INFO):
+            logger.info("<<< %s %s %s", res.status_code, endpoint, res.text)
         return res
 
     def bots_get(self, bot_token: str) -> Optional[Bot]:
@@ -56,9 +161,9 @@ class Api:
 
     def boards_list(self) -> Optional[List[Board]]:
         response = self._req("/boards", "get", {})
-        resp, status = self._return_response_and_status(response)
+        resp, status = self._return_raw_response_and_status(response)
         if status == 200:
-            return [from_dict(Board, board) for board in resp]
+            return self._decode_timed(self._decode_boards, resp)
         return None
 
     def bots_join(self, bot_token: str, board_id: int) -> bool:
@@ -73,9 +178,9 @@ class Api:
 
     def boards_get(self, board_id: str) -> Optional[Board]:
         response = self._req("/boards/{}".format(board_id), "get", {})
-        resp, status = self._return_response_and_status(response)
+        resp, status = self._return_raw_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return self._decode_timed(self.board_decoder, resp)
         return None
 
     def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
@@ -84,9 +189,11 @@ class Api:
             "post",
             {"direction": direction},
         )
-        resp, status = self._return_response_and_status(response)
+        if self._is_too_fast(response):
+            raise MoveTooFastError(response.text)
+        resp, status = self._return_raw_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return self._decode_timed(self.board_decoder, resp)
         return None
 
     def bots_recover(self, email: str, password: str) -> Optional[str]:
@@ -101,13 +208,97 @@ class Api:
         except:
             return None
 
+    @staticmethod
+    def _is_too_fast(response: Response) -> bool:
+        if response.status_code == 429:
+            return True
+        return response.status_code in (400, 403) and "fast" in response.text.lower()
+
     def _return_response_and_status(
         self, response: Response
     ) -> Tuple[Union[dict, List], int]:
-        resp = response.json()
+        response_data, status = self._return_raw_response_and_status(response)
+        return decode(response_data), status
+
+    def _return_raw_response_and_status(
+        self, response: Response
+    ) -> Tuple[Union[dict, List], int]:
+        resp = self._decode_timed(Response.json, response)
 
         response_data = resp.get("data") if isinstance(resp, dict) else resp
         if not response_data:
             response_data = resp
 
-        return decode(response_data), response.status_code
+        return response_data, response.status_code
+
+
+@dataclass
+class AsyncApi:
+    """
+    Awaitable counterpart of Api. Requests are sent through the wrapped
+    client's connection pool from a thread pool, so many bots can share one
+    event loop without blocking each other.
+    """
+
+    api: Api
+    executor: Optional[ThreadPoolExecutor] = None
+
+    def __post_init__(self):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.api.pool_size, thread_name_prefix="api"
+            )
+
+    @property
+    def last_timing(self) -> Optional[RequestTiming]:
+        """
+        Timing of the last request awaited in the current task
+        """
+        return _last_timing.get()
+
+    def _call(self, func, args):
+        # The timing lives in the worker thread, hand it back with the result
+        try:
+            return func(*args), self.api.last_timing, None
+        except Exception as e:
+            return None, self.api.last_timing, e
+
+    async def _run(self, func, *args):
+        # Imported on first use, so blocking bots start without asyncio
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        result, timing, error = await loop.run_in_executor(
+            self.executor, self._call, func, args
+        )
+        _last_timing.set(timing)
+        if error is not None:
+            raise error
+        return result
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.api.close()
+
+    async def bots_get(self, bot_token: str) -> Optional[Bot]:
+        return await self._run(self.api.bots_get, bot_token)
+
+    async def bots_register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        return await self._run(self.api.bots_register, name, email, password, team)
+
+    async def boards_list(self) -> Optional[List[Board]]:
+        return await self._run(self.api.boards_list)
+
+    async def bots_join(self, bot_token: str, board_id: int) -> bool:
+        return await self._run(self.api.bots_join, bot_token, board_id)
+
+    async def boards_get(self, board_id: str) -> Optional[Board]:
+        return await self._run(self.api.boards_get, board_id)
+
+    async def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+        return await self._run(self.api.bots_move, bot_token, direction)
+
+    async def bots_recover(self, email: str, password: str) -> Optional[str]:
+        return await self._run(self.api.bots_recover, email, password)
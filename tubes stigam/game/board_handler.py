@@ -1,8 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Union, List
-from game.api import Api
+from game.api import Api, AsyncApi
 from game.models import Board
 
+
+def _session_seconds(board: Board) -> int:
+    # Seconds a bot may play after joining, from the BotProvider feature
+    for feature in board.features:
+        if feature.name == "BotProvider" and feature.config:
+            return feature.config.seconds or 0
+    return 0
+
+
+def rank_boards(boards: List[Board]) -> List[Board]:
+    """
+    Order boards to try joining, best first: fewest bots, then the longest
+    session. Boards whose objects are unknown go last.
+    :param boards: list of Board
+    :return: list of Board
+    """
+
+    def key(board: Board):
+        bots = len(board.bots) if board.game_objects is not None else float("inf")
+        return bots, -_session_seconds(board), board.id
+
+    return sorted(boards, key=key)
+
+
+def _without_objects(boards: List[Board]) -> List[int]:
+    return [board.id for board in boards if board.game_objects is None]
+
+
+def _merge(boards: List[Board], fetched: List[Board]) -> List[Board]:
+    by_id = {board.id: board for board in fetched if board}
+    return rank_boards([by_id.get(board.id, board) for board in boards])
+
+
 @dataclass
 class BoardHandler:
     api: Api
@@ -12,3 +46,39 @@ class BoardHandler:
 
     def get_board(self, board_id: int) -> Board:
         return self.api.boards_get(board_id)
+
+    def probe_boards(self) -> List[Board]:
+        """
+        Every board, ranked with rank_boards. Boards listed without their
+        objects are fetched concurrently, so many boards cost one round trip
+        :return: list of Board
+        """
+        boards = self.list_boards() or []
+        ids = _without_objects(boards)
+        if not ids:
+            return rank_boards(boards)
+        with ThreadPoolExecutor(max_workers=min(len(ids), self.api.pool_size)) as executor:
+            return _merge(boards, list(executor.map(self.get_board, ids)))
+
+
+@dataclass
+class AsyncBoardHandler:
+    api: AsyncApi
+
+    async def list_boards(self) -> List[Board]:
+        return await self.api.boards_list()
+
+    async def get_board(self, board_id: int) -> Board:
+        return await self.api.boards_get(board_id)
+
+    async def probe_boards(self) -> List[Board]:
+        """
+        Same as BoardHandler.probe_boards
+        """
+        import asyncio
+
+        boards = await self.list_boards() or []
+        ids = _without_objects(boards)
+        if not ids:
+            return rank_boards(boards)
+        return _merge(boards, await asyncio.gather(*map(self.get_board, ids)))
@@ -0,0 +1,185 @@
+import threading
+from time import monotonic
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from game.board_handler import AsyncBoardHandler, BoardHandler
+from game.decoder import decode_board, decode_feature, decode_game_object
+from game.models import Board, BoardChanges, Feature, GameObject
+
+
+class _Snapshots:
+    """
+    Latest known board per board id, shared by every bot of the process.
+
+    Boards handed out are shared between bots and must be treated as read-only
+    by the logic. A board is considered current for one tick, i.e. for the
+    board's minimum delay between moves.
+    """
+
+    def __init__(self):
+        self._boards: Dict[int, Tuple[float, Board]] = {}
+
+    def current(self, board_id: int) -> Optional[Board]:
+        snapshot = self._boards.get(board_id)
+        return snapshot[1] if snapshot else None
+
+    def publish(self, board: Board, received_at: Optional[float] = None):
+        """
+        Replace the shared snapshot of the board, unless a board received
+        later was already published
+        :param board: Board
+        :param received_at: monotonic time the board was received, defaults to now
+        """
+        if received_at is None:
+            received_at = monotonic()
+        snapshot = self._boards.get(board.id)
+        if snapshot is None or snapshot[0] <= received_at:
+            self._boards[board.id] = (received_at, board)
+
+    def _fresh(self, board_id: int) -> Optional[Board]:
+        snapshot = self._boards.get(board_id)
+        if snapshot is None:
+            return None
+        received_at, board = snapshot
+        if monotonic() - received_at < board.minimum_delay_between_moves / 1000:
+            return board
+        return None
+
+
+class SharedBoards(_Snapshots):
+    def __init__(self, board_handler: BoardHandler):
+        super().__init__()
+        self.board_handler = board_handler
+        self._lock = threading.RLock()
+
+    def publish(self, board: Board, received_at: Optional[float] = None):
+        with self._lock:
+            super().publish(board, received_at)
+
+    def get_board(self, board_id: int) -> Optional[Board]:
+        """
+        Board snapshot of this tick, fetched by the first bot that asks for it
+        """
+        with self._lock:
+            board = self._fresh(board_id)
+            if board is None:
+                board = self.board_handler.get_board(board_id)
+                if board:
+                    self.publish(board)
+            return board
+
+
+class AsyncSharedBoards(_Snapshots):
+    def __init__(self, board_handler: AsyncBoardHandler):
+        super().__init__()
+        self.board_handler = board_handler
+        self._fetches: Dict[int, "asyncio.Future"] = {}
+
+    async def get_board(self, board_id: int) -> Optional[Board]:
+        """
+        Board snapshot of this tick. Bots asking while it is being fetched
+        wait for the same request instead of sending their own
+        """
+        import asyncio
+
+        board = self._fresh(board_id)
+        if board is not None:
+            return board
+
+        fetch = self._fetches.get(board_id)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch(board_id))
+            self._fetches[board_id] = fetch
+        return await asyncio.shield(fetch)
+
+    async def _fetch(self, board_id: int) -> Optional[Board]:
+        try:
+            board = await self.board_handler.get_board(board_id)
+            if board:
+                self.publish(board)
+            return board
+        finally:
+            del self._fetches[board_id]
+
+
+@dataclass
+class _Previous:
+    # Raw JSON and decoded object per game object id
+    objects: Dict[int, Tuple[dict, GameObject]]
+    raw_features: List[dict]
+    features: List[Feature]
+
+
+class BoardStore:
+    """
+    Decodes board payloads against the previous payload of the same board id.
+    Game objects whose JSON did not change since then are reused instead of
+    built again, so a tick mostly allocates the bots. Every board returned
+    carries what changed since the previous one in Board.changes; the first
+    board of an id lists every object as added.
+
+    Use decode as the board_decoder of an Api. It is thread-safe, so all bots
+    of a process can share one store.
+    """
+
+    def __init__(self):
+        self._previous: Dict[int, _Previous] = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+        self.decoded = 0
+
+    def decode(self, data: dict) -> Board:
+        """
+        :param data: dict with camelCase or snake_case keys, see decode_board
+        :return: Board
+        """
+        raw_objects = data.get("gameObjects", data.get("game_objects"))
+        if raw_objects is None:
+            return decode_board(data)
+
+        with self._lock:
+            previous = self._previous.get(data["id"])
+            known = previous.objects if previous else {}
+            objects = {}
+            game_objects = []
+            added, moved, changed = [], [], []
+            for raw in raw_objects:
+                old = known.get(raw["id"])
+                if old is not None and old[0] == raw:
+                    obj = old[1]
+                    self.reused += 1
+                else:
+                    obj = decode_game_object(raw)
+                    self.decoded += 1
+                    if old is None:
+                        added.append(obj)
+                    elif old[1].position != obj.position:
+                        moved.append(obj)
+                    else:
+                        changed.append(obj)
+                objects[obj.id] = (raw, obj)
+                game_objects.append(obj)
+            removed = [old[1] for id, old in known.items() if id not in objects]
+
+            raw_features = data["features"]
+            if previous and previous.raw_features == raw_features:
+                features = previous.features
+            else:
+                features = [decode_feature(feature) for feature in raw_features]
+            self._previous[data["id"]] = _Previous(objects, raw_features, features)
+
+        return Board(
+            id=data["id"],
+            width=data["width"],
+            height=data["height"],
+            features=features,
+            minimum_delay_between_moves=data.get(
+                "minimumDelayBetweenMoves", data.get("minimum_delay_between_moves")
+            ),
+            game_objects=game_objects,
+            changes=BoardChanges(added, removed, moved, changed),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {"reused": self.reused, "decoded": self.decoded}
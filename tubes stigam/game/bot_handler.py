@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from typing import Optional
 
 import requests
-from game.api import Api
+from game.api import Api, AsyncApi
 from game.models import Board, Bot
 
 
@@ -42,3 +42,27 @@ class BotHandler:
 
     def recover(self, email: str, password: str) -> Optional[str]:
         return self.api.bots_recover(email, password)
+
+
+@dataclass
+class AsyncBotHandler:
+    api: AsyncApi
+
+    async def get_my_info(self, token: str) -> Bot:
+        return await self.api.bots_get(token)
+
+    async def join(self, token: str, board_id: int) -> bool:
+        return await self.api.bots_join(token, board_id)
+
+    async def move(
+        self, token: str, board_id: int, dx: int, dy: int
+    ) -> Optional[Board]:
+        return await self.api.bots_move(token, BotHandler._get_direction(dx, dy))
+
+    async def register(
+        self, name: str, email: str, password: str, team: str
+    ) -> Optional[Bot]:
+        return await self.api.bots_register(name, email, password, team)
+
+    async def recover(self, email: str, password: str) -> Optional[str]:
+        return await self.api.bots_recover(email, password)
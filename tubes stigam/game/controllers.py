@@ -0,0 +1,21 @@
+from importlib import import_module
+from typing import Type
+
+from game.logic.base import BaseLogic
+
+# Logic classes as "module:class", imported when a bot first uses them, so
+# starting a bot only pays for the logic it plays
+CONTROLLERS = {
+    "Random": "game.logic.random:RandomLogic",
+    "Stigam": "game.logic.stigam:Stigam",
+    "Lookahead": "game.logic.search:LookaheadLogic",
+}
+
+
+def load_controller(name: str) -> Type[BaseLogic]:
+    """
+    :param name: key of CONTROLLERS
+    :return: the logic class
+    """
+    module, _, cls = CONTROLLERS[name].partition(":")
+    return getattr(import_module(module), cls)
@@ -0,0 +1,167 @@
+from dataclasses import fields
+from functools import cached_property
+from typing import Dict, List, Optional
+
+from game.models import Base, Board, Config, Feature, GameObject, Position, Properties
+
+
+def _camel_case(value: str) -> str:
+    head, *tail = value.split("_")
+    return head + "".join(part.title() for part in tail)
+
+
+def _key_table(cls) -> Dict[str, str]:
+    """
+    Map both the camelCase and the snake_case spelling of every field of the
+    given dataclass to the field name. Keys that are not in the table are not
+    part of the schema and are dropped, like dacite does.
+    """
+    table = {}
+    for field in fields(cls):
+        table[field.name] = field.name
+        table[_camel_case(field.name)] = field.name
+    return table
+
+
+_PROPERTIES_KEYS = _key_table(Properties)
+_CONFIG_KEYS = _key_table(Config)
+# Marks a lazy attribute that was not built yet, None is a valid value
+_MISSING = object()
+
+
+def _decode_position(data: dict) -> Position:
+    return Position(y=data["y"], x=data["x"])
+
+
+def _decode_properties(data: Optional[dict]) -> Optional[Properties]:
+    if data is None:
+        return None
+    keys = _PROPERTIES_KEYS
+    kwargs = {keys[key]: value for key, value in data.items() if key in keys}
+    base = kwargs.get("base")
+    if base is not None:
+        kwargs["base"] = Base(y=base["y"], x=base["x"])
+    return Properties(**kwargs)
+
+
+def decode_game_object(data: dict) -> GameObject:
+    return GameObject(
+        id=data["id"],
+        position=_decode_position(data["position"]),
+        type=data["type"],
+        properties=_decode_properties(data.get("properties")),
+    )
+
+
+def decode_feature(data: dict) -> Feature:
+    config = data.get("config")
+    if config is not None:
+        keys = _CONFIG_KEYS
+        config = Config(
+            **{keys[key]: value for key, value in config.items() if key in keys}
+        )
+    return Feature(name=data["name"], config=config)
+
+
+def decode_board(data: dict) -> Board:
+    """
+    Build a Board straight from the parsed JSON of the server, without
+    renaming every key first and without dacite's reflection
+    :param data: dict with camelCase or snake_case keys
+    :return: Board
+    """
+    game_objects = data.get("gameObjects", data.get("game_objects"))
+    if game_objects is not None:
+        game_objects = [decode_game_object(obj) for obj in game_objects]
+    return Board(
+        id=data["id"],
+        width=data["width"],
+        height=data["height"],
+        features=[decode_feature(feature) for feature in data["features"]],
+        minimum_delay_between_moves=data.get(
+            "minimumDelayBetweenMoves", data.get("minimum_delay_between_moves")
+        ),
+        game_objects=game_objects,
+    )
+
+
+def decode_boards(data: List[dict]) -> List[Board]:
+    return [decode_board(board) for board in data]
+
+
+class LazyGameObject(GameObject):
+    """
+    A GameObject over its raw JSON. id and type are read from it, position
+    and properties are built on first access and kept.
+    """
+
+    __slots__ = ("_data", "_position", "_properties")
+
+    def __init__(self, data: dict):
+        self._data = data
+        self._position = None
+        self._properties = _MISSING
+
+    @property
+    def id(self) -> int:
+        return self._data["id"]
+
+    @property
+    def type(self) -> str:
+        return self._data["type"]
+
+    @property
+    def position(self) -> Position:
+        if self._position is None:
+            self._position = _decode_position(self._data["position"])
+        return self._position
+
+    @property
+    def properties(self) -> Optional[Properties]:
+        if self._properties is _MISSING:
+            self._properties = _decode_properties(self._data.get("properties"))
+        return self._properties
+
+
+class LazyBoard(Board):
+    """
+    A Board over the parsed JSON of the server that builds nothing up front.
+    Features are decoded on first access, and game objects are LazyGameObjects
+    whose position and properties are decoded when read, so the parts of a
+    payload the logic never looks at cost nothing. Use it as board_decoder of
+    an Api.
+    """
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    @property
+    def id(self) -> int:
+        return self._data["id"]
+
+    @property
+    def width(self) -> int:
+        return self._data["width"]
+
+    @property
+    def height(self) -> int:
+        return self._data["height"]
+
+    @property
+    def minimum_delay_between_moves(self) -> int:
+        data = self._data
+        return data.get(
+            "minimumDelayBetweenMoves", data.get("minimum_delay_between_moves")
+        )
+
+    @cached_property
+    def features(self) -> List[Feature]:
+        return [decode_feature(feature) for feature in self._data["features"]]
+
+    @cached_property
+    def game_objects(self) -> Optional[List[GameObject]]:
+        data = self._data
+        game_objects = data.get("gameObjects", data.get("game_objects"))
+        if game_objects is None:
+            return None
+        return [LazyGameObject(obj) for obj in game_objects]
@@ -0,0 +1,414 @@
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from time import monotonic, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from game.decoder import decode_board
+from game.models import Board
+
+Cell = Tuple[int, int]
+
+DELTAS = {(1, 0), (-1, 0), (0, 1), (0, -1)}
+
+
+class GameError(Exception):
+    """
+    A request the game rejects. status is the HTTP status the server
+    answers with.
+    """
+
+    status = 400
+
+
+class InvalidMoveError(GameError):
+    status = 400
+
+
+class TooFastError(GameError):
+    status = 403
+
+
+class NotOnBoardError(GameError):
+    status = 403
+
+
+class JoinError(GameError):
+    status = 409
+
+
+class GameClock:
+    """
+    Game time in milliseconds, running speed times faster than the wall
+    clock, so a whole game can be played in a fraction of its length
+    """
+
+    def __init__(self, speed: float = 1):
+        self.speed = speed
+        self._wall = time() * 1000
+        self._start = monotonic()
+
+    def __call__(self) -> float:
+        return self._wall + (monotonic() - self._start) * 1000 * self.speed
+
+
+class ManualClock:
+    """
+    Game time that only moves when advanced, for games played without
+    waiting
+    """
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def advance(self, milliseconds: float):
+        self.now += milliseconds
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass
+class EngineConfig:
+    width: int = 15
+    height: int = 15
+    minimum_delay_between_moves: int = 100
+    # Seconds every bot may play after joining
+    session_length: int = 60
+    inventory_size: int = 5
+    can_tackle: bool = True
+    # Share of the cells holding a diamond after generation
+    generation_ratio: float = 0.1
+    # Diamonds are generated again once fewer than this share of them is left
+    min_ratio_for_generation: float = 0.5
+    red_ratio: float = 0.2
+    teleport_pairs: int = 1
+    # Seconds between teleporter relocations, 0 to keep them in place
+    teleport_relocation: int = 30
+    diamond_button: bool = True
+
+
+@dataclass
+class _BotState:
+    id: int
+    base_id: int
+    token: str
+    name: str
+    base: Cell
+    position: Cell
+    joined_at: float
+    diamonds: int = 0
+    score: int = 0
+    last_move_at: Optional[float] = None
+
+
+class GameEngine:
+    """
+    The rules of one Diamonds board, without any networking.
+
+    Bots join on a base of their own and play until their session is over.
+    Stepping onto a diamond picks it up when it fits in the inventory (red
+    diamonds count two), stepping onto the own base deposits the inventory
+    into the score, stepping onto a teleporter lands on its partner, and
+    stepping onto another bot tackles it: its diamonds go to the tackler and
+    it is sent back to its base. The red button replaces every diamond.
+    Diamonds are generated again when few are left, and teleporters move
+    every now and then.
+
+    The engine reads the time from clock (milliseconds), so it can run in
+    real time, on a fast clock, or on a clock advanced by hand.
+    """
+
+    def __init__(
+        self,
+        config: Optional[EngineConfig] = None,
+        board_id: int = 1,
+        clock: Optional[Callable[[], float]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.config = config or EngineConfig()
+        self.board_id = board_id
+        self.clock = clock or GameClock()
+        self.rng = random.Random(seed)
+        self.bots: Dict[str, _BotState] = {}
+        # Name and score of every bot whose session is over
+        self.results: List[Tuple[str, int]] = []
+        self.diamonds: Dict[Cell, Tuple[int, int]] = {}
+        self.teleports: List[Tuple[int, Cell]] = []
+        self.button: Optional[Tuple[int, Cell]] = None
+        self._next_id = 1
+        self._relocated_at = self.clock()
+
+        for _ in range(self.config.teleport_pairs):
+            self.teleports.append((self._new_id(), self._free_cell()))
+            self.teleports.append((self._new_id(), self._free_cell()))
+        if any(cell is None for _, cell in self.teleports):
+            # Too small a board for every pair
+            self.teleports = []
+        if self.config.diamond_button:
+            cell = self._free_cell()
+            self.button = (self._new_id(), cell) if cell else None
+        self._generate()
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id - 1
+
+    def _occupied(self) -> set:
+        cells = set(self.diamonds)
+        cells.update(cell for _, cell in self.teleports)
+        if self.button:
+            cells.add(self.button[1])
+        for bot in self.bots.values():
+            cells.add(bot.position)
+            cells.add(bot.base)
+        return cells
+
+    def _free_cell(self) -> Optional[Cell]:
+        occupied = self._occupied()
+        free = [
+            (x, y)
+            for y in range(self.config.height)
+            for x in range(self.config.width)
+            if (x, y) not in occupied
+        ]
+        return self.rng.choice(free) if free else None
+
+    @property
+    def diamond_target(self) -> int:
+        config = self.config
+        return max(1, int(config.width * config.height * config.generation_ratio))
+
+    def _generate(self):
+        while len(self.diamonds) < self.diamond_target:
+            cell = self._free_cell()
+            if cell is None:
+                return
+            points = 2 if self.rng.random() < self.config.red_ratio else 1
+            self.diamonds[cell] = (self._new_id(), points)
+
+    def _press_button(self):
+        old = self.button
+        self.diamonds.clear()
+        self.button = None
+        self._generate()
+        cell = self._free_cell()
+        # On a full board the button stays where it is
+        self.button = (self._new_id(), cell) if cell else old
+
+    def _relocate_teleports(self):
+        old = self.teleports
+        self.teleports = []
+        for _ in old:
+            cell = self._free_cell()
+            if cell is None:
+                # No room to move every teleporter, they all stay
+                self.teleports = old
+                return
+            self.teleports.append((self._new_id(), cell))
+
+    def update(self, now: Optional[float] = None):
+        """
+        Apply everything that happens with time: sessions ending and
+        teleporters moving
+        """
+        now = self.clock() if now is None else now
+        session = self.config.session_length * 1000
+        for token, bot in list(self.bots.items()):
+            if now - bot.joined_at >= session:
+                del self.bots[token]
+                self.results.append((bot.name, bot.score))
+
+        relocation = self.config.teleport_relocation * 1000
+        if relocation and now - self._relocated_at >= relocation:
+            self._relocated_at = now
+            self._relocate_teleports()
+
+    def join(self, token: str, name: str) -> None:
+        """
+        Put a bot on the board, on a new base
+        :raises JoinError: when the bot already plays or there is no room
+        """
+        self.update()
+        if token in self.bots:
+            raise JoinError("Bot is already on the board")
+        base = self._free_cell()
+        if base is None:
+            raise JoinError("Board is full")
+        self.bots[token] = _BotState(
+            id=self._new_id(),
+            base_id=self._new_id(),
+            token=token,
+            name=name,
+            base=base,
+            position=base,
+            joined_at=self.clock(),
+        )
+
+    def _bot_at(self, cell: Cell, other_than: _BotState) -> Optional[_BotState]:
+        for bot in self.bots.values():
+            if bot is not other_than and bot.position == cell:
+                return bot
+        return None
+
+    def _teleport(self, cell: Cell) -> Cell:
+        for i, (_, teleport) in enumerate(self.teleports):
+            if teleport == cell:
+                return self.teleports[i ^ 1][1]
+        return cell
+
+    def move(self, token: str, delta_x: int, delta_y: int) -> None:
+        """
+        Move a bot one cell and apply what happens where it lands
+        :raises NotOnBoardError: when the bot does not play on this board
+        :raises InvalidMoveError: for moves that are not one step on the board
+        :raises TooFastError: when the bot moved less than the minimum delay ago
+        """
+        now = self.clock()
+        self.update(now)
+        bot = self.bots.get(token)
+        if bot is None:
+            raise NotOnBoardError("Bot is not on the board")
+        if (delta_x, delta_y) not in DELTAS:
+            raise InvalidMoveError("Invalid direction")
+        if (
+            bot.last_move_at is not None
+            and now - bot.last_move_at < self.config.minimum_delay_between_moves
+        ):
+            raise TooFastError("Move too fast")
+        x, y = bot.position[0] + delta_x, bot.position[1] + delta_y
+        if not (0 <= x < self.config.width and 0 <= y < self.config.height):
+            raise InvalidMoveError("Move out of the board")
+        if not self.config.can_tackle and self._bot_at((x, y), bot):
+            raise InvalidMoveError("Cell is occupied")
+
+        bot.last_move_at = now
+        self._land(bot, self._teleport((x, y)))
+
+    def _land(self, bot: _BotState, cell: Cell):
+        capacity = self.config.inventory_size
+        other = self._bot_at(cell, bot)
+        if other is not None:
+            bot.diamonds += min(other.diamonds, capacity - bot.diamonds)
+            other.diamonds = 0
+            other.position = other.base
+        bot.position = cell
+
+        diamond = self.diamonds.get(cell)
+        if diamond is not None and bot.diamonds + diamond[1] <= capacity:
+            bot.diamonds += diamond[1]
+            del self.diamonds[cell]
+            if len(self.diamonds) < self.diamond_target * self.config.min_ratio_for_generation:
+                self._generate()
+
+        if cell == bot.base:
+            bot.score += bot.diamonds
+            bot.diamonds = 0
+
+        if self.button is not None and cell == self.button[1]:
+            self._press_button()
+
+    def _features(self) -> List[dict]:
+        config = self.config
+        return [
+            {
+                "name": "DiamondProvider",
+                "config": {
+                    "generationRatio": config.generation_ratio,
+                    "minRatioForGeneration": config.min_ratio_for_generation,
+                    "redRatio": config.red_ratio,
+                },
+            },
+            {"name": "DiamondButtonProvider", "config": {}},
+            {"name": "TeleportProvider", "config": {"pairs": config.teleport_pairs}},
+            {
+                "name": "TeleportRelocationProvider",
+                "config": {"seconds": config.teleport_relocation},
+            },
+            {
+                "name": "BotProvider",
+                "config": {
+                    "inventorySize": config.inventory_size,
+                    "canTackle": config.can_tackle,
+                    "seconds": config.session_length,
+                },
+            },
+        ]
+
+    def to_json(self) -> dict:
+        """
+        The board as the server sends it, with camelCase keys
+        """
+        now = self.clock()
+        self.update(now)
+        config = self.config
+        session = config.session_length * 1000
+        objects = []
+        for bot in self.bots.values():
+            base = {"x": bot.base[0], "y": bot.base[1]}
+            objects.append(
+                {
+                    "id": bot.base_id,
+                    "position": dict(base),
+                    "type": "BaseGameObject",
+                    "properties": {"name": bot.name},
+                }
+            )
+            objects.append(
+                {
+                    "id": bot.id,
+                    "position": {"x": bot.position[0], "y": bot.position[1]},
+                    "type": "BotGameObject",
+                    "properties": {
+                        "name": bot.name,
+                        "diamonds": bot.diamonds,
+                        "score": bot.score,
+                        "inventorySize": config.inventory_size,
+                        "canTackle": config.can_tackle,
+                        "millisecondsLeft": max(0, int(session - (now - bot.joined_at))),
+                        "timeJoined": datetime.fromtimestamp(
+                            bot.joined_at / 1000, timezone.utc
+                        ).isoformat(),
+                        "base": base,
+                    },
+                }
+            )
+        for i, (object_id, cell) in enumerate(self.teleports):
+            objects.append(
+                {
+                    "id": object_id,
+                    "position": {"x": cell[0], "y": cell[1]},
+                    "type": "TeleportGameObject",
+                    "properties": {"pairId": str(i // 2 + 1)},
+                }
+            )
+        if self.button is not None:
+            object_id, cell = self.button
+            objects.append(
+                {
+                    "id": object_id,
+                    "position": {"x": cell[0], "y": cell[1]},
+                    "type": "DiamondButtonGameObject",
+                    "properties": {},
+                }
+            )
+        for cell, (object_id, points) in self.diamonds.items():
+            objects.append(
+                {
+                    "id": object_id,
+                    "position": {"x": cell[0], "y": cell[1]},
+                    "type": "DiamondGameObject",
+                    "properties": {"points": points},
+                }
+            )
+        return {
+            "id": self.board_id,
+            "width": config.width,
+            "height": config.height,
+            "minimumDelayBetweenMoves": config.minimum_delay_between_moves,
+            "features": self._features(),
+            "gameObjects": objects,
+        }
+
+    def board(self) -> Board:
+        return decode_board(self.to_json())
@@ -0,0 +1,72 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from colorama import Fore, Style
+
+LOGGER_NAME = "game"
+REDACTED_KEYS = {"password"}
+COLORS = {
+    logging.DEBUG: Style.DIM,
+    logging.WARNING: Fore.YELLOW + Style.BRIGHT,
+    logging.ERROR: Fore.RED + Style.BRIGHT,
+    logging.CRITICAL: Fore.RED + Style.BRIGHT,
+}
+
+
+class Redacted:
+    """
+    A request body that hides secrets when it is formatted. Formatting only
+    happens when the record is emitted, so building one costs nothing.
+    """
+
+    __slots__ = ("body",)
+
+    def __init__(self, body: dict):
+        self.body = body
+
+    def __str__(self) -> str:
+        return str(
+            {key: "***" if key in REDACTED_KEYS else value for key, value in self.body.items()}
+        )
+
+
+class ColorFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        color = COLORS.get(record.levelno)
+        return color + message + Style.RESET_ALL if color else message
+
+
+def configure_logging(
+    level: str = "INFO", quiet: bool = False, use_queue: bool = False
+) -> Optional[QueueListener]:
+    """
+    Set up the logger of the game package, which the modules log to
+    through their own child loggers (game.api, game.play, ...).
+    :param level: name of the lowest level shown, e.g. DEBUG to see every request
+    :param quiet: drop everything below ERROR. Disabled levels are checked
+    before any message is built, so quiet bots pay nothing for logging.
+    :param use_queue: hand records to a background thread that writes them,
+    so a slow console never holds up a tick
+    :return: the listener of the queue, already started, or None
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(logging.ERROR if quiet else level.upper())
+    logger.propagate = False
+    logger.handlers.clear()
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(ColorFormatter("%(message)s"))
+    if not use_queue:
+        logger.addHandler(handler)
+        return None
+
+    records = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(records))
+    listener = QueueListener(records, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -1,9 +1,33 @@
+import copy
 from abc import ABC
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 from game.models import Board, GameObject
 
 
 class BaseLogic(ABC):
+    # Monotonic time by which next_move should return, set by the game loop
+    # before every call. None when there is no budget.
+    deadline: Optional[float] = None
+
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         raise NotImplementedError()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Counters the logic wants reported when the game is over
+        """
+        return {}
+
+    def fork(self) -> "BaseLogic":
+        """
+        An independent copy to decide on a board that may never come, see
+        Precomputer. Logics with a large state override it with a cheaper copy.
+        """
+        return copy.deepcopy(self)
+
+    def adopt(self, fork: "BaseLogic"):
+        """
+        Take over the state of a fork whose decision was used
+        """
+        self.__dict__.update(fork.__dict__)
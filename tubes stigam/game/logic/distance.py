@@ -0,0 +1,386 @@
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from game.models import Board, GameObject, Position
+
+UNREACHABLE = float("inf")
+DIRECTIONS = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+FROM = "from"
+TO = "to"
+
+
+@lru_cache(maxsize=8)
+def grid_neighbours(width: int, height: int) -> List[List[int]]:
+    """
+    In-bounds neighbour cells of every cell of a width x height grid
+    """
+    neighbours = []
+    for y in range(height):
+        for x in range(width):
+            neighbours.append(
+                [
+                    (y + dy) * width + x + dx
+                    for dx, dy in DIRECTIONS
+                    if 0 <= x + dx < width and 0 <= y + dy < height
+                ]
+            )
+    return neighbours
+
+
+def teleport_pairs(board: Board) -> Dict[int, int]:
+    """
+    Map the cell of every teleporter to the cell of its partner, i.e. the cell
+    a bot stepping onto the teleporter ends up on
+    """
+    groups: Dict[Optional[str], List[GameObject]] = {}
+    for teleport in board.objects_of_type("TeleportGameObject"):
+        pair_id = teleport.properties.pair_id if teleport.properties else None
+        groups.setdefault(pair_id, []).append(teleport)
+
+    pairs = {}
+    width = board.width
+    for teleports in groups.values():
+        if len(teleports) != 2:
+            continue
+        a, b = teleports[0].position, teleports[1].position
+        pairs[a.y * width + a.x] = b.y * width + b.x
+        pairs[b.y * width + b.x] = a.y * width + a.x
+    return pairs
+
+
+class DistanceFields:
+    """
+    Exact move counts between cells of one board snapshot.
+
+    Every step costs one move. Stepping onto a teleporter lands the bot on
+    its partner, so teleporters are taken into account. Cells of the other
+    bots can be stepped onto (tackled) but not walked through. Fields are
+    computed by BFS over the whole grid on first use and cached, so any
+    number of distance queries from or to the same cell during a tick are
+    array lookups.
+    """
+
+    def __init__(
+        self, board: Board, bot: GameObject, cache: Optional["DistanceCache"] = None
+    ):
+        self.width = board.width
+        self.height = board.height
+        self.teleports = teleport_pairs(board)
+        self.blocked: Set[int] = {
+            self.cell(other.position)
+            for other in board.bots
+            if other.properties.name != bot.properties.name
+        }
+        self.cache = cache
+        self._neighbours = grid_neighbours(self.width, self.height)
+        self._fields: Dict[Tuple[str, int], List[float]] = {}
+
+    def cell(self, position: Position) -> int:
+        return position.y * self.width + position.x
+
+    def contains(self, position: Position) -> bool:
+        return 0 <= position.x < self.width and 0 <= position.y < self.height
+
+    def _field(self, kind: str, cell: int) -> List[float]:
+        key = (kind, cell)
+        field = self.cache.get(key) if self.cache is not None else self._fields.get(key)
+        if field is None:
+            field = self._bfs_from(cell) if kind == FROM else self._bfs_to(cell)
+            if self.cache is not None:
+                self.cache.put(key, field)
+            else:
+                self._fields[key] = field
+        return field
+
+    def _peek(self, kind: str, cell: int) -> Optional[List[float]]:
+        if self.cache is not None:
+            return self.cache.peek((kind, cell))
+        return self._fields.get((kind, cell))
+
+    def field_from(self, source: Position) -> List[float]:
+        """
+        Moves needed to go from source to every cell
+        """
+        return self._field(FROM, self.cell(source))
+
+    def field_to(self, target: Position) -> List[float]:
+        """
+        Moves needed to go from every cell to target
+        """
+        return self._field(TO, self.cell(target))
+
+    def _bfs_from(self, source: int) -> List[float]:
+        field = [UNREACHABLE] * (self.width * self.height)
+        field[source] = 0
+        queue = deque([source])
+        neighbours, teleports, blocked = self._neighbours, self.teleports, self.blocked
+        while queue:
+            cell = queue.popleft()
+            if cell in blocked and cell != source:
+                continue
+            moves = field[cell] + 1
+            for neighbour in neighbours[cell]:
+                landing = teleports.get(neighbour, neighbour)
+                if field[landing] == UNREACHABLE:
+                    field[landing] = moves
+                    queue.append(landing)
+        return field
+
+    def _bfs_to(self, target: int) -> List[float]:
+        field = [UNREACHABLE] * (self.width * self.height)
+        field[target] = 0
+        queue = deque([target])
+        neighbours, teleports, blocked = self._neighbours, self.teleports, self.blocked
+        while queue:
+            cell = queue.popleft()
+            # A bot stands on a teleporter only after stepping onto its partner
+            entry = teleports.get(cell, cell)
+            moves = field[cell] + 1
+            for neighbour in neighbours[entry]:
+                if neighbour in blocked or field[neighbour] != UNREACHABLE:
+                    continue
+                field[neighbour] = moves
+                queue.append(neighbour)
+        return field
+
+    def distance(self, a: Position, b: Position) -> float:
+        """
+        Moves needed to go from a to b. Positions outside the board, e.g.
+        placeholders, fall back to the Manhattan distance.
+        """
+        if not (self.contains(a) and self.contains(b)):
+            return abs(a.x - b.x) + abs(a.y - b.y)
+        to_b = self._peek(TO, self.cell(b))
+        if to_b is not None:
+            return to_b[self.cell(a)]
+        return self.field_from(a)[self.cell(b)]
+
+    def step_towards(
+        self, position: Position, goal: Position, prefer: Tuple[int, int] = (0, 0)
+    ) -> Optional[Tuple[int, int]]:
+        """
+        First move of a shortest path from position to goal, or None when the
+        goal cannot be reached. Among equally short paths the preferred
+        direction wins.
+        """
+        if not (self.contains(position) and self.contains(goal)):
+            return None
+        field = self.field_to(goal)
+        best, best_moves = None, UNREACHABLE
+        for dx, dy in [prefer] + DIRECTIONS:
+            if (dx, dy) == (0, 0):
+                continue
+            x, y = position.x + dx, position.y + dy
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                continue
+            cell = y * self.width + x
+            if cell in self.blocked and cell != self.cell(goal):
+                continue
+            moves = field[self.teleports.get(cell, cell)]
+            if moves < best_moves:
+                best, best_moves = (dx, dy), moves
+        return best
+
+    def _successors(self, cell: int) -> List[int]:
+        teleports = self.teleports
+        return [teleports.get(neighbour, neighbour) for neighbour in self._neighbours[cell]]
+
+    def _predecessors(self, cell: int) -> List[int]:
+        return self._neighbours[self.teleports.get(cell, cell)]
+
+    def repair(
+        self, kind: str, origin: int, field: List[float], added: Set[int], removed: Set[int]
+    ) -> bool:
+        """
+        Update a field computed on the previous snapshot, where the cells in
+        added were not blocked yet and the cells in removed still were.
+        Returns False when the field has to be computed again.
+        """
+        added = added - {origin}
+        removed = removed - {origin}
+        if kind == FROM:
+            return self._repair_from(origin, field, added, removed)
+        return self._repair_to(origin, field, added, removed)
+
+    def _repair_from(
+        self, source: int, field: List[float], added: Set[int], removed: Set[int]
+    ) -> bool:
+        blocked = self.blocked
+        # A newly blocked cell keeps its own distance, but cells that could
+        # only be reached through it need another way in at the same distance
+        for cell in added:
+            moves = field[cell]
+            if moves == UNREACHABLE:
+                continue
+            for landing in self._successors(cell):
+                if field[landing] != moves + 1 or landing == source:
+                    continue
+                if not any(
+                    parent != cell
+                    and (parent not in blocked or parent == source)
+                    and field[parent] == moves
+                    for parent in self._predecessors(landing)
+                ):
+                    return False
+
+        # Cells that are no longer blocked can only shorten paths
+        queue = deque(cell for cell in removed if field[cell] != UNREACHABLE)
+        while queue:
+            cell = queue.popleft()
+            if cell in blocked and cell != source:
+                continue
+            moves = field[cell] + 1
+            for landing in self._successors(cell):
+                if moves < field[landing]:
+                    field[landing] = moves
+                    queue.append(landing)
+        return True
+
+    def _repair_to(
+        self, target: int, field: List[float], added: Set[int], removed: Set[int]
+    ) -> bool:
+        blocked = self.blocked
+        # Nobody can stand on a newly blocked cell any more, so cells whose
+        # path led through it need another next step at the same distance
+        for cell in added:
+            moves = field[cell]
+            if moves == UNREACHABLE:
+                continue
+            field[cell] = UNREACHABLE
+            for previous in self._predecessors(cell):
+                if field[previous] != moves + 1:
+                    continue
+                if not any(
+                    landing != cell
+                    and (landing not in blocked or landing == target)
+                    and field[landing] == moves
+                    for landing in self._successors(previous)
+                ):
+                    return False
+
+        queue = deque()
+        for cell in removed:
+            moves = min(
+                (
+                    field[landing]
+                    for landing in self._successors(cell)
+                    if landing not in blocked or landing == target
+                ),
+                default=UNREACHABLE,
+            ) + 1
+            if moves < field[cell]:
+                field[cell] = moves
+                queue.append(cell)
+        while queue:
+            cell = queue.popleft()
+            moves = field[cell] + 1
+            for previous in self._predecessors(cell):
+                if previous in blocked:
+                    continue
+                if moves < field[previous]:
+                    field[previous] = moves
+                    queue.append(previous)
+        return True
+
+
+class DistanceCache:
+    """
+    Keeps distance fields from one tick to the next.
+
+    Between two snapshots usually only a few bots moved. Instead of starting
+    over, every cached field is repaired for the cells that became blocked or
+    free, and dropped only when that is not possible. Fields are evicted least
+    recently used first. The counters show how well this works over a game.
+    """
+
+    def __init__(self, max_fields: int = 128):
+        self.max_fields = max_fields
+        self._fields: "OrderedDict[Tuple[str, int], List[float]]" = OrderedDict()
+        self._layout = None
+        self._blocked: Set[int] = set()
+        # Fields shared with the cache this one was forked from, copied
+        # before they are repaired
+        self._shared: Set[Tuple[str, int]] = set()
+        self.hits = 0
+        self.misses = 0
+        self.repaired = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def update(self, board: Board, bot: GameObject) -> DistanceFields:
+        """
+        Distance fields of a new snapshot, reusing what is still valid
+        """
+        fields = DistanceFields(board, bot, self)
+        layout = (fields.width, fields.height, sorted(fields.teleports.items()))
+        if layout != self._layout:
+            self.invalidated += len(self._fields)
+            self._fields.clear()
+            self._shared.clear()
+        else:
+            added = fields.blocked - self._blocked
+            removed = self._blocked - fields.blocked
+            if added or removed:
+                for key, field in list(self._fields.items()):
+                    if key in self._shared:
+                        self._shared.discard(key)
+                        field = self._fields[key] = list(field)
+                    if fields.repair(key[0], key[1], field, added, removed):
+                        self.repaired += 1
+                    else:
+                        del self._fields[key]
+                        self.invalidated += 1
+        self._layout = layout
+        self._blocked = fields.blocked
+        return fields
+
+    def get(self, key: Tuple[str, int]) -> Optional[List[float]]:
+        field = self._fields.get(key)
+        if field is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._fields.move_to_end(key)
+        return field
+
+    def peek(self, key: Tuple[str, int]) -> Optional[List[float]]:
+        return self._fields.get(key)
+
+    def put(self, key: Tuple[str, int], field: List[float]):
+        self._fields[key] = field
+        self._shared.discard(key)
+        if len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+            self.evicted += 1
+
+    def fork(self) -> "DistanceCache":
+        """
+        A copy that shares the fields with this cache until it repairs them
+        """
+        fork = DistanceCache(self.max_fields)
+        fork._fields = OrderedDict(self._fields)
+        fork._layout = self._layout
+        fork._blocked = self._blocked
+        fork._shared = set(self._fields)
+        fork.hits = self.hits
+        fork.misses = self.misses
+        fork.repaired = self.repaired
+        fork.invalidated = self.invalidated
+        fork.evicted = self.evicted
+        return fork
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "distance_hits": self.hits,
+            "distance_misses": self.misses,
+            "distance_hit_rate": round(self.hit_rate, 3),
+            "distance_repaired": self.repaired,
+            "distance_invalidated": self.invalidated,
+            "distance_evicted": self.evicted,
+        }
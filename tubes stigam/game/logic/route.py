@@ -0,0 +1,237 @@
+import copy
+from dataclasses import dataclass, field, replace
+from itertools import permutations
+from typing import Callable, Dict, List, Optional, Tuple
+
+from game.models import Board, GameObject, Position
+from game.util import position_equals
+
+DEFAULT_CAPACITY = 5
+MAX_CANDIDATES = 8
+# Tours with up to this many stops try every order, longer ones improve the
+# greedy order with 2-opt
+MAX_EXHAUSTIVE = 5
+
+
+@dataclass
+class Route:
+    """
+    A collection tour: the diamonds to pick up in order, then back to base.
+    load is the number of diamonds the bot is expected to carry right now.
+    """
+
+    diamonds: List[GameObject] = field(default_factory=list)
+    load: int = 0
+    points: int = 0
+    moves: float = 0
+
+    @property
+    def home(self) -> bool:
+        return not self.diamonds
+
+
+def _points(diamond: GameObject) -> int:
+    return (diamond.properties.points if diamond.properties else None) or 1
+
+
+def _greedy(
+    first: int,
+    candidates: List[int],
+    points: List[int],
+    capacity: int,
+    matrix: List[List[float]],
+    home: List[float],
+) -> List[int]:
+    # Keep adding the diamond with the smallest detour per point on the way home
+    order, load, position = [first], points[first], first
+    rest = [i for i in candidates if i != first]
+    while rest:
+        fits = [i for i in rest if load + points[i] <= capacity]
+        if not fits:
+            break
+        row = matrix[position]
+        best = min(
+            fits, key=lambda i: (row[i] + home[i] - home[position]) / points[i]
+        )
+        order.append(best)
+        rest.remove(best)
+        load += points[best]
+        position = best
+    return order
+
+
+def _tour(order: Tuple[int, ...], matrix: List[List[float]], home: List[float]) -> float:
+    moves, position = 0, 0
+    for i in order:
+        moves += matrix[position][i]
+        position = i
+    return moves + home[position]
+
+
+def _two_opt(
+    order: Tuple[int, ...], matrix: List[List[float]], home: List[float]
+) -> Tuple[int, ...]:
+    # Reverse stretches of the tour as long as that makes it shorter
+    best, best_moves = order, _tour(order, matrix, home)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(best) - 1):
+            for j in range(i + 2, len(best) + 1):
+                tour = best[:i] + best[i:j][::-1] + best[j:]
+                moves = _tour(tour, matrix, home)
+                if moves < best_moves:
+                    best, best_moves, improved = tour, moves, True
+    return best
+
+
+def plan_route(
+    start: Position,
+    base: Position,
+    diamonds: List[GameObject],
+    capacity: int,
+    distance: Callable[[Position, Position], float],
+    max_moves: float = float("inf"),
+) -> List[GameObject]:
+    """
+    Pick the diamonds to collect before going back to base, and the order to
+    collect them in, so that the points per move of the whole tour are as
+    high as possible
+    :param start: position of the bot
+    :param base: position of the base
+    :param diamonds: candidate diamonds, only those that fit are considered
+    :param capacity: free room in the inventory, red diamonds take two
+    :param distance: moves between two positions
+    :param max_moves: the tour has to fit in this many moves
+    :return: list of diamonds in collection order, empty to go home
+    """
+    candidates = [
+        d
+        for d in diamonds
+        if _points(d) <= capacity and distance(start, d.position) < max_moves
+    ]
+    candidates.sort(key=lambda d: distance(start, d.position))
+    candidates = candidates[:MAX_CANDIDATES]
+
+    # Index 0 is the bot, 1.. the candidates. Every distance is looked up once.
+    positions = [start] + [d.position for d in candidates]
+    matrix = [[distance(a, b) for b in positions] for a in positions]
+    home = [distance(p, base) for p in positions]
+    points = [0] + [_points(d) for d in candidates]
+    indexes = list(range(1, len(positions)))
+
+    best, best_rate = (), 0.0
+    seen = set()
+    for first in indexes:
+        order = _greedy(first, indexes, points, capacity, matrix, home)
+        for size in range(1, len(order) + 1):
+            chosen = frozenset(order[:size])
+            if chosen in seen:
+                continue
+            seen.add(chosen)
+            if size <= MAX_EXHAUSTIVE:
+                tour = min(permutations(order[:size]), key=lambda p: _tour(p, matrix, home))
+            else:
+                tour = _two_opt(tuple(order[:size]), matrix, home)
+            moves = _tour(tour, matrix, home)
+            if moves > max_moves:
+                continue
+            rate = sum(points[i] for i in tour) / max(moves, 1)
+            if rate > best_rate:
+                best, best_rate = tour, rate
+    return [candidates[i - 1] for i in best]
+
+
+def _length(
+    start: Position,
+    base: Position,
+    order: List[GameObject],
+    distance: Callable[[Position, Position], float],
+) -> float:
+    moves, position = 0, start
+    for diamond in order:
+        moves += distance(position, diamond.position)
+        position = diamond.position
+    return moves + distance(position, base)
+
+
+class RoutePlanner:
+    """
+    Plans a whole collection tour once and keeps following it.
+
+    On every tick the cached route is only checked against the new board:
+    the next diamond is dropped when the bot picked it up, and the route is
+    planned again when a diamond of the route disappeared or moved, or when
+    the inventory does not hold what the route expects (tackled, deposited).
+    """
+
+    def __init__(self):
+        self.route: Optional[Route] = None
+        self.planned = 0
+        self.reused = 0
+
+    def _advance(self, bot: GameObject) -> bool:
+        route = self.route
+        carried = bot.properties.diamonds or 0
+        if route.diamonds and carried == route.load + _points(route.diamonds[0]):
+            if position_equals(bot.position, route.diamonds[0].position):
+                route.load += _points(route.diamonds.pop(0))
+        return carried == route.load
+
+    def _valid(self, board: Board, bot: GameObject) -> bool:
+        if self.route is None or not self._advance(bot):
+            return False
+        if self.route.home and self.route.load == 0:
+            return False
+        for diamond in self.route.diamonds:
+            current = board.get_object(diamond.id)
+            if current is None or not position_equals(current.position, diamond.position):
+                return False
+        return True
+
+    def next_target(
+        self,
+        board: Board,
+        bot: GameObject,
+        distance: Callable[[Position, Position], float],
+        max_moves: float = float("inf"),
+    ) -> Optional[Position]:
+        """
+        Next position of the route, planning a new route when needed
+        :return: a diamond, the base when the route is done, or None when
+        there is nothing to collect and nothing to bring home
+        """
+        if self._valid(board, bot):
+            self.reused += 1
+        else:
+            self.planned += 1
+            props = bot.properties
+            carried = props.diamonds or 0
+            capacity = (props.inventory_size or DEFAULT_CAPACITY) - carried
+            diamonds = plan_route(
+                bot.position, props.base, board.diamonds, capacity, distance, max_moves
+            )
+            self.route = Route(
+                diamonds=diamonds,
+                load=carried,
+                points=sum(_points(d) for d in diamonds),
+                moves=_length(bot.position, props.base, diamonds, distance),
+            )
+
+        if self.route.diamonds:
+            return self.route.diamonds[0].position
+        if self.route.load > 0:
+            return bot.properties.base
+        return None
+
+    def fork(self) -> "RoutePlanner":
+        """
+        A copy whose route can be followed without changing this one
+        """
+        fork = copy.copy(self)
+        if self.route is not None:
+            fork.route = replace(self.route, diamonds=list(self.route.diamonds))
+        return fork
+
+    def stats(self) -> Dict[str, float]:
+        return {"route_planned": self.planned, "route_reused": self.reused}
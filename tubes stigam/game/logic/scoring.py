@@ -0,0 +1,74 @@
+from typing import Callable, Iterable, List, Optional, Set
+
+from game.models import GameObject, Position
+
+
+def manhattan(a: Position, b: Position) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+class DiamondScores:
+    """
+    Scores every candidate diamond of a tick in one batch.
+
+    The score of a diamond is the trip bot -> diamond -> base. When three or
+    more candidates remain, the distance to the nearest other candidate is
+    added and the points of both diamonds are subtracted, favouring clusters.
+    Lower is better.
+
+    All distances (bot, base, and every diamond pair) are computed once, when
+    the scores are built. Dropping candidates only re-pairs the diamonds whose
+    nearest neighbour was dropped.
+    """
+
+    def __init__(
+        self,
+        diamonds: List[GameObject],
+        bot_pos: Position,
+        base_pos: Position,
+        distance: Callable[[Position, Position], int] = manhattan,
+    ):
+        self.diamonds = diamonds
+        positions = [d.position for d in diamonds]
+        self.points = [d.properties.points or 0 for d in diamonds]
+        self.trip = [distance(bot_pos, p) + distance(p, base_pos) for p in positions]
+        count = len(diamonds)
+        self.pair = [[distance(a, b) for b in positions] for a in positions]
+        # Other diamonds of each diamond, nearest first, ties in board order
+        self.neighbours = [
+            sorted((j for j in range(count) if j != i), key=lambda j: (row[j], j))
+            for i, row in enumerate(self.pair)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.diamonds)
+
+    def _nearest(self, i: int, active: Set[int]) -> Optional[int]:
+        for j in self.neighbours[i]:
+            if j in active:
+                return j
+        return None
+
+    def score(self, i: int, active: Set[int]) -> int:
+        if len(active) < 3:
+            return self.trip[i]
+        j = self._nearest(i, active)
+        return self.trip[i] + self.pair[i][j] - self.points[j] - self.points[i]
+
+    def ranked(self, active: Optional[Iterable[int]] = None) -> List[int]:
+        """
+        Indexes of the candidate diamonds, best first
+        :param active: indexes still considered, defaults to every diamond
+        :return: list of indexes into diamonds
+        """
+        active = set(range(len(self))) if active is None else set(active)
+        return sorted(active, key=lambda i: (self.score(i, active), i))
+
+    def best(self, active: Optional[Iterable[int]] = None) -> Optional[int]:
+        active = set(range(len(self))) if active is None else set(active)
+        if not active:
+            return None
+        return min(active, key=lambda i: (self.score(i, active), i))
+
+    def position(self, i: int) -> Position:
+        return self.diamonds[i].position
@@ -0,0 +1,225 @@
+import random
+from math import log, sqrt
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.logic.distance import DIRECTIONS, teleport_pairs
+from game.models import Board, GameObject
+
+DEFAULT_BUDGET = 0.05
+DEFAULT_CAPACITY = 5
+HORIZON = 20
+DISCOUNT = 0.95
+# Share of rollout steps that follow the greedy policy instead of a random move
+GREEDY = 0.8
+EXPLORATION = 1.4
+
+
+class Simulation:
+    """
+    A small copy of one board snapshot that can play moves ahead.
+
+    Our bot collects diamonds that fit in its inventory, deposits them on its
+    base, lands on the partner of every teleporter it steps onto, and tackles
+    a bot by stepping onto it: the tackled bot goes back to its base and its
+    diamonds go to the tackler. Enemies head for their nearest diamond, or
+    their base once full, and can tackle us the same way.
+    """
+
+    def __init__(self, board: Board, bot: GameObject):
+        self.width = board.width
+        self.height = board.height
+        self.teleports = teleport_pairs(board)
+        props = bot.properties
+        self.cell = self._cell(bot.position)
+        self.base = self._cell(props.base)
+        self.carried = props.diamonds or 0
+        self.capacity = props.inventory_size or DEFAULT_CAPACITY
+        self.diamonds: Dict[int, int] = {
+            self._cell(d.position): d.properties.points or 1 for d in board.diamonds
+        }
+        # cell, carried diamonds, base cell and capacity of every enemy
+        self.enemies: List[Tuple[int, int, int, int]] = [
+            (
+                self._cell(other.position),
+                other.properties.diamonds or 0,
+                self._cell(other.properties.base),
+                other.properties.inventory_size or DEFAULT_CAPACITY,
+            )
+            for other in board.bots
+            if other.properties.name != props.name and other.properties.base
+        ]
+        self.moves_left = None
+        if props.milliseconds_left is not None and board.minimum_delay_between_moves:
+            self.moves_left = props.milliseconds_left // board.minimum_delay_between_moves
+
+    def _cell(self, position) -> int:
+        return position.y * self.width + position.x
+
+    def valid_moves(self, cell: int) -> List[Tuple[int, int]]:
+        x, y = cell % self.width, cell // self.width
+        return [
+            (dx, dy)
+            for dx, dy in DIRECTIONS
+            if 0 <= x + dx < self.width and 0 <= y + dy < self.height
+        ]
+
+    def _step(self, cell: int, move: Tuple[int, int]) -> int:
+        x, y = cell % self.width + move[0], cell // self.width + move[1]
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return cell
+        landing = y * self.width + x
+        return self.teleports.get(landing, landing)
+
+    def _towards(self, cell: int, target: int) -> Tuple[int, int]:
+        width = self.width
+        dx = target % width - cell % width
+        dy = target // width - cell // width
+        if dx and (not dy or abs(dx) >= abs(dy)):
+            return (1 if dx > 0 else -1), 0
+        if dy:
+            return 0, (1 if dy > 0 else -1)
+        return 0, 0
+
+    def _nearest(self, cell: int, diamonds: Dict[int, int], room: int) -> Optional[int]:
+        width = self.width
+        x, y = cell % width, cell // width
+        best, best_distance = None, None
+        for target, points in diamonds.items():
+            if points > room:
+                continue
+            distance = abs(target % width - x) + abs(target // width - y)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = target, distance
+        return best
+
+    def _policy(
+        self, cell: int, carried: int, diamonds: Dict[int, int], rng: random.Random
+    ) -> Tuple[int, int]:
+        if rng.random() > GREEDY:
+            return rng.choice(self.valid_moves(cell))
+        target = None
+        if carried < self.capacity:
+            target = self._nearest(cell, diamonds, self.capacity - carried)
+        if target is None:
+            target = self.base
+        move = self._towards(cell, target)
+        if move == (0, 0):
+            return rng.choice(self.valid_moves(cell))
+        return move
+
+    def rollout(
+        self, first: Tuple[int, int], horizon: int, rng: random.Random
+    ) -> Tuple[float, int]:
+        """
+        Play first and then up to horizon - 1 moves of the rollout policy
+        :return: discounted points brought home, and the number of steps
+        """
+        if self.moves_left is not None:
+            horizon = min(horizon, self.moves_left)
+        cell, carried = self.cell, self.carried
+        diamonds = dict(self.diamonds)
+        enemies = list(self.enemies)
+        value, weight, steps = 0.0, 1.0, 0
+        move = first
+
+        while steps < horizon:
+            steps += 1
+            cell = self._step(cell, move)
+            for i, (enemy, enemy_carried, enemy_base, enemy_capacity) in enumerate(enemies):
+                if enemy == cell:
+                    carried = min(self.capacity, carried + enemy_carried)
+                    enemies[i] = (enemy_base, 0, enemy_base, enemy_capacity)
+            points = diamonds.get(cell)
+            if points is not None and carried + points <= self.capacity:
+                carried += points
+                del diamonds[cell]
+            if cell == self.base and carried:
+                value += weight * carried
+                carried = 0
+
+            for i, (enemy, enemy_carried, enemy_base, enemy_capacity) in enumerate(enemies):
+                target = None
+                if enemy_carried < enemy_capacity:
+                    target = self._nearest(enemy, diamonds, enemy_capacity - enemy_carried)
+                enemy = self._step(enemy, self._towards(enemy, target if target is not None else enemy_base))
+                if enemy == cell and cell != self.base:
+                    enemy_carried = min(enemy_capacity, enemy_carried + carried)
+                    cell, carried = self.base, 0
+                points = diamonds.get(enemy)
+                if points is not None and enemy_carried + points <= enemy_capacity:
+                    enemy_carried += points
+                    del diamonds[enemy]
+                if enemy == enemy_base:
+                    enemy_carried = 0
+                enemies[i] = (enemy, enemy_carried, enemy_base, enemy_capacity)
+
+            weight *= DISCOUNT
+            move = self._policy(cell, carried, diamonds, rng)
+
+        if self.moves_left is None or steps < self.moves_left:
+            # Diamonds still carried are probably brought home later
+            value += weight * carried / 2
+        return value, steps
+
+
+class LookaheadLogic(BaseLogic):
+    """
+    Monte-Carlo lookahead: plays random-greedy rollouts from every possible
+    move until the deadline set by the game loop and picks the move with the
+    best average outcome. The search is anytime, so it always answers in
+    time with the best move found so far.
+    """
+
+    def __init__(self, horizon: int = HORIZON, seed: Optional[int] = None):
+        self.horizon = horizon
+        self.rng = random.Random(seed)
+        self.nodes = 0
+        self.rollouts = 0
+        self.decisions = 0
+        self.search_time = 0.0
+
+    def _select(self, totals: List[float], counts: List[int]) -> int:
+        # UCB1: try every move once, then favour promising and rarely tried moves
+        for i, count in enumerate(counts):
+            if count == 0:
+                return i
+        total_log = log(sum(counts))
+        return max(
+            range(len(counts)),
+            key=lambda i: totals[i] / counts[i] + EXPLORATION * sqrt(total_log / counts[i]),
+        )
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        started = monotonic()
+        deadline = self.deadline if self.deadline is not None else started + DEFAULT_BUDGET
+        simulation = Simulation(board, board_bot)
+        moves = simulation.valid_moves(simulation.cell)
+        totals = [0.0] * len(moves)
+        counts = [0] * len(moves)
+
+        while True:
+            i = self._select(totals, counts)
+            value, steps = simulation.rollout(moves[i], self.horizon, self.rng)
+            totals[i] += value
+            counts[i] += 1
+            self.nodes += steps
+            self.rollouts += 1
+            if min(counts) > 0 and monotonic() >= deadline:
+                break
+
+        self.decisions += 1
+        self.search_time += monotonic() - started
+        best = max(range(len(moves)), key=lambda i: (totals[i] / counts[i], counts[i]))
+        return moves[best]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "search_decisions": self.decisions,
+            "search_rollouts": self.rollouts,
+            "search_nodes": self.nodes,
+            "search_nodes_per_second": round(self.nodes / self.search_time)
+            if self.search_time
+            else 0,
+        }
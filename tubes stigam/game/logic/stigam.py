@@ -1,40 +1,33 @@
+import copy
 import random
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
 from game.logic.base import BaseLogic
+from game.logic.distance import DistanceCache, DistanceFields
+from game.logic.route import RoutePlanner
+from game.logic.scoring import DiamondScores
 from game.models import GameObject, Board, Position
-from game.util import clamp
+from game.util import clamp, position_equals
 
 class Stigam(BaseLogic):
-    def init(self):
+    def __init__(self):
         # arah pergerakan: kanan, bawah, kiri, atas
         self.directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
         # posisi tujuan
         self.goal_position: Optional[Position] = None
         # arah saat ini
         self.current_direction = 0
+        # jarak langkah di board sekarang, field BFS disimpan dan diperbaiki antar tick
+        self.distance_cache = DistanceCache()
+        self.fields: Optional[DistanceFields] = None
+        # rute pengambilan diamond, dihitung sekali lalu hanya dicek ulang tiap tick
+        self.route_planner = RoutePlanner()
 
     def distance(self, a: Position, b: Position) -> int:
-        # Menghitung jarak Manhattan antar dua posisi
-        return abs(a.x - b.x) + abs(a.y - b.y)
-
-    def distance_portal(self, curr_pos: Position, transition: Position, target_pos: Position) -> int:
-        # jarak dari posisi sekarang ke target melewati portal
-        return (self.distance(curr_pos, transition) +
-                self.distance(transition, target_pos))
-
-    def nearest_position(self, curr_pos: Position, positions: List[Position]) -> Optional[Position]:
-        # mencari posisi terdekat dari daftar posisi
-        if not positions:
-            return None
-        return min(positions, key=lambda p: self.distance(curr_pos, p))
-
-    def objects_in_area(self, center: Position, positions: List[Position], area: int) -> List[Position]:
-        # return posisi-posisi objek dalam area tertentu
-        return [p for p in positions if self.distance(center, p) <= area]
-
-    def is_object_in_area(self, center: Position, positions: List[Position], area: int) -> bool:
-        # mengecek apakah ada objek dalam area tertentu
-        return any(self.distance(center, p) <= area for p in positions)
+        # Menghitung jarak langkah antar dua posisi (sudah termasuk teleport dan bot lawan),
+        # Manhattan kalau belum ada board
+        if self.fields is None:
+            return abs(a.x - b.x) + abs(a.y - b.y)
+        return self.fields.distance(a, b)
 
     def same_direction(self, curr_pos: Position, target1: Position, target2: Position) -> bool:
         # mengecek apakah dua target berada dalam arah yang sama dari posisi sekarang
@@ -62,133 +55,72 @@ class Stigam(BaseLogic):
             else:
                 return 0, delta_y
 
-    def get_distance_with_portal_and_base(self, curr_pos: Position, near_portal: Position, far_portal: Position, target_pos: Position, base_pos: Position) -> int:
-        # menghitung jarak total menggunakan teleport lalu ke base
-        dist_portal = (self.distance(curr_pos, near_portal) +
-                       self.distance(far_portal, target_pos) +
-                       min(self.distance(target_pos, base_pos),
-                           self.distance(target_pos, far_portal) + self.distance(near_portal, base_pos)))
-        return dist_portal
-
-    def dodge_teleport(self, curr_pos: Position, near_tele: Position, far_tele: Position, goal_pos: Position) -> Position:
-        # menghindari teleport jika tidak dipakai
-        delta_x = goal_pos.x - curr_pos.x
-        delta_y = goal_pos.y - curr_pos.y
-
-        if curr_pos.y == goal_pos.y:
-            if abs(curr_pos.y + 1 - far_tele.y) == 0 or abs(curr_pos.y - 1 - far_tele.y) == 0:
-                return Position(x=curr_pos.x, y=curr_pos.y + 1 if curr_pos.y + 1 == far_tele.y else curr_pos.y - 1)
-            return Position(x=curr_pos.x, y=curr_pos.y + 1 if curr_pos.y + 1 < 15 else curr_pos.y - 1)
-
-        elif curr_pos.x == goal_pos.x:
-            if abs(curr_pos.x + 1 - far_tele.x) == 0 or abs(curr_pos.x - 1 - far_tele.x) == 0:
-                return Position(x=curr_pos.x + 1 if curr_pos.x + 1 == far_tele.x else curr_pos.x - 1, y=curr_pos.y)
-            return Position(x=curr_pos.x + 1 if curr_pos.x + 1 < 15 else curr_pos.x - 1, y=curr_pos.y)
-
-        elif curr_pos.y == near_tele.y:
-            return Position(x=curr_pos.x, y=curr_pos.y + 1 if delta_y > 0 else curr_pos.y - 1)
-        elif curr_pos.x == near_tele.x:
-            return Position(x=curr_pos.x + 1 if delta_x > 0 else curr_pos.x - 1, y=curr_pos.y)
-
-        return goal_pos
-
-    def get_nearest_diamond(self, bot_pos: Position, diamond_positions: List[Position]) -> Optional[Position]:
-        # mendapatkan diamond terdekat dari posisi bot
-        return self.nearest_position(bot_pos, diamond_positions)
-
-    def get_nearest_diamond_base(self, diamonds: List[GameObject], diamond_positions: List[Position], bot_pos: Position, base_pos: Position) -> Optional[Position]:
-        # mendapatkan diamond dengan melihat jarak dan nilainya
-        min_distance = float('inf')
-        nearest_diamond = None
-        for diamond in diamond_positions:
-            if len(diamond_positions) >= 3:
-                other_diamonds = [d for d in diamond_positions if d != diamond]
-                nearest_other = self.nearest_position(diamond, other_diamonds)
-
-                nearest_obj = next((d for d in diamonds if d.position == nearest_other), None)
-                curr_obj = next((d for d in diamonds if d.position == diamond), None)
-
-                dist = (self.distance(bot_pos, diamond) +
-                        self.distance(diamond, base_pos) +
-                        self.distance(diamond, nearest_other) -
-                        (nearest_obj.properties.points if nearest_obj else 0) -
-                        (curr_obj.properties.points if curr_obj else 0))
-            else:
-                dist = self.distance(bot_pos, diamond) + self.distance(diamond, base_pos)
+    def can_take(self, bot: GameObject, diamond: GameObject) -> bool:
+        # diamond merah tidak muat kalau inventory sudah hampir penuh
+        return not (bot.properties.diamonds >= 4 and diamond.properties.points == 2)
 
-            if dist < min_distance:
-                min_distance = dist
-                nearest_diamond = diamond
-        return nearest_diamond
+    def enemy_in_area(self, board: Board, bot: GameObject, area: int) -> bool:
+        # mengecek apakah ada bot lawan dalam area tertentu, pakai grid board
+        return any(obj.properties.name != bot.properties.name
+                   for obj in board.objects_within(bot.position, area, "BotGameObject"))
 
-    def diamond_process(self, base_pos: Position, diamonds: List[GameObject], diamond_positions: List[Position], bot: GameObject, red_button_pos: Position):
-        # proses pemilihan tujuan berdasarkan diamond, base, dan tombol merah
+    def diamond_process(self, base_pos: Position, target: Optional[Position], bot: GameObject, red_button_pos: Position):
+        # proses pemilihan tujuan berdasarkan rute diamond, base, dan tombol merah
         bot_pos = bot.position
-        nearest_diamond_with_base = self.get_nearest_diamond_base(diamonds, diamond_positions, bot_pos, base_pos)
 
-        if (self.distance(bot_pos, nearest_diamond_with_base) > self.distance(bot_pos, red_button_pos) and
-            self.distance(bot_pos, nearest_diamond_with_base) > 2):
+        if target is None:
+            #tidak ada diamond yang bisa diambil, tekan tombol merah kalau ada
+            self.goal_position = red_button_pos if red_button_pos != Position(-1, -1) else None
+        elif (self.distance(bot_pos, target) > self.distance(bot_pos, red_button_pos) and
+            self.distance(bot_pos, target) > 2):
             self.goal_position = red_button_pos
-        elif (self.distance(bot_pos, nearest_diamond_with_base) > self.distance(bot_pos, base_pos) and
-              self.same_direction(bot_pos, nearest_diamond_with_base, base_pos) and
+        elif (self.distance(bot_pos, target) > self.distance(bot_pos, base_pos) and
+              self.same_direction(bot_pos, target, base_pos) and
               bot.properties.diamonds > 2):
             self.goal_position = base_pos
         else:
-            nearest_diamond = self.get_nearest_diamond(bot_pos, diamond_positions)
-            if nearest_diamond and self.distance(bot_pos, nearest_diamond) <= 2:
-                self.goal_position = nearest_diamond
-            else:
-                self.goal_position = nearest_diamond_with_base
+            self.goal_position = target
 
-    def bot_process(self, bot: GameObject, enemies_pos: List[Position], diamond_positions: List[Position], diamonds: List[GameObject], base_pos: Position) -> Optional[Position]:
+    def bot_process(self, bot: GameObject, enemies_pos: List[Position], scores: DiamondScores) -> Optional[Position]:
         # mendapatkan diamond terdekat dengan mempertimbangkan posisi musuh
         curr_pos = bot.position
-        dm_candidate = diamond_positions.copy()
+        dm_candidate = set(range(len(scores)))
 
         for enemy in enemies_pos:
             delta_x_en, delta_y_en = self.get_direction_v2(curr_pos.x, curr_pos.y, enemy.x, enemy.y)
             while dm_candidate:
-                nearest_dm = self.get_nearest_diamond_base(diamonds, dm_candidate, curr_pos, base_pos)
+                best = scores.best(dm_candidate)
+                nearest_dm = scores.position(best)
                 delta_x_dm, delta_y_dm = self.get_direction_v2(curr_pos.x, curr_pos.y, nearest_dm.x, nearest_dm.y)
                 if delta_x_en == delta_x_dm and delta_y_en == delta_y_dm:
-                    dm_candidate.remove(nearest_dm)
+                    dm_candidate.discard(best)
                 else:
                     return nearest_dm
 
         if dm_candidate:
-            return self.get_nearest_diamond_base(diamonds, dm_candidate, curr_pos, base_pos)
+            return scores.position(scores.best(dm_candidate))
         return None
 
+    def stats(self) -> Dict[str, float]:
+        return {**self.distance_cache.stats(), **self.route_planner.stats()}
+
+    def fork(self) -> "Stigam":
+        # salinan murah untuk keputusan spekulatif, field BFS baru disalin saat diperbaiki
+        fork = copy.copy(self)
+        fork.distance_cache = self.distance_cache.fork()
+        fork.route_planner = self.route_planner.fork()
+        return fork
+
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         # method utama untuk menentukan langkah bot
         bot = board_bot
-        teleports_pos = []
-        red_buttons_pos = []
-        enemy_positions = []
-        diamond_positions = []
-        diamonds = []
-
         base_pos = bot.properties.base
 
-        for obj in getattr(board, "game_objects", []):
-            if obj.type == "DiamondGameObject":
-                if bot.properties.diamonds >= 4 and obj.properties.points == 2:
-                    continue
-                diamonds.append(obj)
-                diamond_positions.append(obj.position)
-            elif obj.type == "TeleportGameObject":
-                teleports_pos.append(obj.position)
-            elif obj.type == "BotGameObject":
-                if bot.properties.name != obj.properties.name:
-                    enemy_positions.append(obj.position)
-            elif obj.type == "DiamondButtonGameObject":
-                red_buttons_pos.append(obj.position)
-
-        if len(teleports_pos) == 2:
-            dist0 = self.distance(bot.position, teleports_pos[0])
-            dist1 = self.distance(bot.position, teleports_pos[1])
-            if dist0 >= dist1:
-                teleports_pos[0], teleports_pos[1] = teleports_pos[1], teleports_pos[0]
+        diamonds = [obj for obj in board.diamonds if self.can_take(bot, obj)]
+        enemy_positions = [obj.position for obj in board.bots if bot.properties.name != obj.properties.name]
+        red_buttons_pos = [obj.position for obj in board.objects_of_type("DiamondButtonGameObject")]
+
+        self.fields = self.distance_cache.update(board, bot)
 
         time_left = getattr(bot.properties, "milliseconds_left", 20000)
 
@@ -198,33 +130,31 @@ class Stigam(BaseLogic):
         if (time_left < 10000 and bot.properties.diamonds > 0) or bot.properties.diamonds == 5:
             self.goal_position = base_pos
         #jika ada bot lawan disekitar, car diamond yang jauh dari bot lawan
-        elif self.is_object_in_area(bot.position, enemy_positions, 2):
-            goal_candidate = self.bot_process(bot, enemy_positions, diamond_positions, diamonds, base_pos)
+        elif self.enemy_in_area(board, bot, 2):
+            scores = DiamondScores(diamonds, bot.position, base_pos, self.distance)
+            goal_candidate = self.bot_process(bot, enemy_positions, scores)
             self.goal_position = goal_candidate if goal_candidate else self.goal_position
         else:
             if red_buttons_pos:
                 red_button_pos = red_buttons_pos[0]
             else:
                 red_button_pos = Position(-1, -1)
-            #pilih diamond yang menguntungkan berdasar jarak
-            self.diamond_process(base_pos, diamonds, diamond_positions, bot, red_button_pos)
-
-        #gunakan teleport kalau  ada untungnya
-        if (self.goal_position and len(teleports_pos) == 2 and
-            self.get_distance_with_portal_and_base(bot.position, teleports_pos[0], teleports_pos[1], self.goal_position, base_pos) <
-            self.distance(bot.position, self.goal_position) + self.distance(self.goal_position, base_pos)):
-            self.goal_position = teleports_pos[0]
+            #ikuti rute pengambilan diamond, rute baru dihitung kalau targetnya hilang
+            moves_left = time_left / max(board.minimum_delay_between_moves or 1, 1)
+            target = self.route_planner.next_target(board, bot, self.distance, moves_left)
+            if self.route_planner.route.home and target is not None:
+                self.goal_position = base_pos
+            else:
+                self.diamond_process(base_pos, target, bot, red_button_pos)
 
-        #untuk menuju ke goal positionnya
+        #untuk menuju ke goal positionnya, lewat jalur terpendek (teleport dipakai kalau lebih cepat,
+        #dihindari kalau tidak)
         if self.goal_position and self.goal_position != Position(-1, -1):
-            delta_x, delta_y = self.get_direction_v2(bot.position.x, bot.position.y, self.goal_position.x, self.goal_position.y)
-            #untuk menghindari teleport kalau bukal goal positionny
-            current_plus_portal = Position(bot.position.x + delta_x, bot.position.y + delta_y)
-            if (len(teleports_pos) == 2 and
-                self.goal_position != teleports_pos[0] and
-                current_plus_portal == teleports_pos[0]):
-                self.goal_position = self.dodge_teleport(bot.position, teleports_pos[0], teleports_pos[1], self.goal_position)
-                delta_x, delta_y = self.get_direction_v2(bot.position.x, bot.position.y, self.goal_position.x, self.goal_position.y)
+            preferred = self.get_direction_v2(bot.position.x, bot.position.y, self.goal_position.x, self.goal_position.y)
+            step = None
+            if not position_equals(bot.position, self.goal_position):
+                step = self.fields.step_towards(bot.position, self.goal_position, preferred)
+            delta_x, delta_y = step if step else preferred
         else:
             #kalau nggk punya tujuan, jalan random
             delta = self.directions[self.current_direction]
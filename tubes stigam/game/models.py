@@ -1,6 +1,9 @@
-from dataclasses import dataclass
-from typing import List, Optional, Union
-from colorama import Fore, Style
+import logging
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -10,17 +13,17 @@ class Bot:
     id: str
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
     y: int
     x: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Base(Position): ...
 
 
-@dataclass
+@dataclass(slots=True)
 class Properties:
     points: Optional[int] = None
     pair_id: Optional[str] = None
@@ -34,7 +37,7 @@ class Properties:
     base: Optional[Base] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GameObject:
     id: int
     position: Position
@@ -59,6 +62,20 @@ class Feature:
     config: Optional[Config] = None
 
 
+@dataclass
+class BoardChanges:
+    """
+    What changed since the previous board of the same id: objects that
+    appeared, disappeared, moved, or stayed but changed otherwise (e.g. a
+    bot's inventory or timer)
+    """
+
+    added: List[GameObject]
+    removed: List[GameObject]
+    moved: List[GameObject]
+    changed: List[GameObject]
+
+
 @dataclass
 class Board:
     id: int
@@ -67,50 +84,161 @@ class Board:
     features: List[Feature]
     minimum_delay_between_moves: int
     game_objects: Optional[List[GameObject]]
+    # Filled in by BoardStore, None for boards decoded on their own
+    changes: Optional[BoardChanges] = field(default=None, compare=False, repr=False)
+
+    @cached_property
+    def _index(
+        self,
+    ) -> Tuple[
+        Dict[str, List[GameObject]], Dict[int, GameObject], Dict[str, GameObject]
+    ]:
+        # Built once per snapshot, on first lookup
+        by_type: Dict[str, List[GameObject]] = {}
+        by_id: Dict[int, GameObject] = {}
+        bots_by_name: Dict[str, GameObject] = {}
+        for obj in self.game_objects or []:
+            by_type.setdefault(obj.type, []).append(obj)
+            by_id[obj.id] = obj
+            if obj.type == "BotGameObject" and obj.properties:
+                bots_by_name.setdefault(obj.properties.name, obj)
+        return by_type, by_id, bots_by_name
+
+    def objects_of_type(self, type: str) -> List[GameObject]:
+        """
+        All game objects of the given type, e.g. "TeleportGameObject". The
+        list is shared by every caller and must not be modified.
+        """
+        return self._index[0].get(type, [])
+
+    def get_object(self, object_id: int) -> Optional[GameObject]:
+        return self._index[1].get(object_id)
 
     @property
     def bots(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "BotGameObject"]
+        return self.objects_of_type("BotGameObject")
 
     @property
     def diamonds(self) -> List[GameObject]:
-        return [d for d in self.game_objects if d.type == "DiamondGameObject"]
+        return self.objects_of_type("DiamondGameObject")
 
     def get_bot(self, bot: Bot) -> Optional[GameObject]:
-        for b in self.bots:
-            if b.properties.name == bot.name:
-                return b
-        return None
+        return self._index[2].get(bot.name)
+
+    @cached_property
+    def _grid(self) -> List[Optional[List[GameObject]]]:
+        # Occupancy grid, one cell per board position in row-major order.
+        # Built once per snapshot, on the first spatial query
+        width, height = self.width, self.height
+        cells: List[Optional[List[GameObject]]] = [None] * (width * height)
+        for obj in self.game_objects or []:
+            x, y = obj.position.x, obj.position.y
+            if 0 <= x < width and 0 <= y < height:
+                cell = cells[y * width + x]
+                if cell is None:
+                    cells[y * width + x] = [obj]
+                else:
+                    cell.append(obj)
+        return cells
+
+    def _ring(self, center: Position, distance: int) -> Iterator[List[GameObject]]:
+        # Occupied cells at exactly the given Manhattan distance from center
+        width, height, grid = self.width, self.height, self._grid
+        for dx in range(-distance, distance + 1):
+            x = center.x + dx
+            if not (0 <= x < width):
+                continue
+            dy = distance - abs(dx)
+            for y in (center.y + dy, center.y - dy) if dy else (center.y,):
+                if 0 <= y < height:
+                    cell = grid[y * width + x]
+                    if cell:
+                        yield cell
+
+    def objects_at(self, position: Position) -> List[GameObject]:
+        if not (0 <= position.x < self.width and 0 <= position.y < self.height):
+            return []
+        return self._grid[position.y * self.width + position.x] or []
+
+    def is_occupied(self, position: Position, type: Optional[str] = None) -> bool:
+        return any(type is None or obj.type == type for obj in self.objects_at(position))
+
+    def objects_within(
+        self, position: Position, radius: int, type: Optional[str] = None
+    ) -> List[GameObject]:
+        """
+        Game objects, optionally of one type, at most radius steps away
+        (Manhattan distance) from position
+        """
+        candidates = self.objects_of_type(type) if type else self.game_objects or []
+        if len(candidates) <= 2 * radius * (radius + 1) + 1:
+            # Fewer objects than cells in the area, a plain scan is cheaper
+            return [
+                obj
+                for obj in candidates
+                if abs(obj.position.x - position.x) + abs(obj.position.y - position.y)
+                <= radius
+            ]
+        return [
+            obj
+            for distance in range(radius + 1)
+            for cell in self._ring(position, distance)
+            for obj in cell
+            if type is None or obj.type == type
+        ]
+
+    def nearest_object(
+        self,
+        position: Position,
+        type: str,
+        predicate: Optional[Callable[[GameObject], bool]] = None,
+    ) -> Optional[GameObject]:
+        """
+        Closest game object of the given type (Manhattan distance) for which
+        predicate holds. Ties go to the object listed first on the board.
+        """
+        candidates = self.objects_of_type(type)
+        searched = 0
+        for distance in range(self.width + self.height):
+            if searched >= len(candidates):
+                break
+            hits = [
+                obj
+                for cell in self._ring(position, distance)
+                for obj in cell
+                if obj.type == type and (predicate is None or predicate(obj))
+            ]
+            if hits:
+                return min(hits, key=candidates.index)
+            searched += 4 * distance if distance else 1
+
+        # Searching further out costs more than checking every candidate
+        best, best_distance = None, None
+        for obj in candidates:
+            if predicate is not None and not predicate(obj):
+                continue
+            distance = abs(obj.position.x - position.x) + abs(obj.position.y - position.y)
+            if best_distance is None or distance < best_distance:
+                best, best_distance = obj, distance
+        return best
 
     def is_valid_move(
         self, current_position: Position, delta_x: int, delta_y: int
     ) -> bool:
         if not (-1 <= delta_x <= 1) or not (-1 <= delta_y <= 1):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta values must be between -1 and 1 inclusive",
-            )
+            logger.debug("Invalid move: Delta values must be between -1 and 1 inclusive")
             return False
 
         if delta_x == delta_y:
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta_x and delta_y cannot be equal",
-            )
+            logger.debug("Invalid move: Delta_x and delta_y cannot be equal")
             return False
 
         if not (0 <= current_position.x + delta_x < self.width):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "X-coordinate out of bounds",
-            )
+            logger.debug("Invalid move: X-coordinate out of bounds")
             return False
 
         if not (0 <= current_position.y + delta_y < self.height):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Y-coordinate out of bounds",
-            )
+            logger.debug("Invalid move: Y-coordinate out of bounds")
             return False
 
         return True
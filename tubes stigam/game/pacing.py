@@ -0,0 +1,82 @@
+from time import monotonic, sleep
+
+# Smallest time given to the logic to decide a move, in seconds
+MIN_BUDGET = 0.005
+# Weight of the newest round trip in the measured latency
+LATENCY_WEIGHT = 0.2
+
+
+class MovePacer:
+    """
+    Keeps a bot moving as fast as the board allows.
+
+    A tick starts when a move is sent. Time spent deciding and waiting for the
+    server counts towards the tick, so only what is left of the board's
+    minimum delay (times the time factor) is slept before the next move. When
+    the server still rejects a move as too fast, an extra delay is added and
+    then shrunk again for every accepted move.
+
+    The round trip of every move is measured, so the logic can be told how
+    much of the delay is left to think once the response is in.
+    """
+
+    def __init__(self, minimum_delay_ms: int, time_factor: float = 1):
+        self.delay = minimum_delay_ms / 1000 * time_factor
+        self.penalty = 0.0
+        self.max_penalty = max(self.delay, 0.05)
+        self.last_sent = None
+        self.latency = 0.0
+
+    def remaining(self) -> float:
+        """
+        Seconds to wait before the next move may be sent
+        :return: float
+        """
+        if self.last_sent is None:
+            return 0.0
+        return max(0.0, self.last_sent + self.delay + self.penalty - monotonic())
+
+    def wait(self):
+        remaining = self.remaining()
+        if remaining > 0:
+            sleep(remaining)
+
+    def deadline(self) -> float:
+        """
+        Monotonic time by which the next move should be decided: the move
+        delay minus the measured latency, starting now
+        :return: float
+        """
+        budget = self.delay + self.penalty - self.latency
+        return monotonic() + max(budget, MIN_BUDGET)
+
+    def sent(self):
+        self.last_sent = monotonic()
+
+    def received(self):
+        """
+        Record the round trip of the move sent last
+        """
+        if self.last_sent is None:
+            return
+        latency = monotonic() - self.last_sent
+        if self.latency:
+            latency = self.latency + LATENCY_WEIGHT * (latency - self.latency)
+        self.latency = latency
+
+    def skipped(self) -> float:
+        """
+        Seconds to wait when no move was sent this tick, e.g. after an
+        invalid move, so the logic does not spin on the same board
+        :return: float
+        """
+        return max(self.delay + self.penalty, self.remaining(), 0.01)
+
+    def accepted(self):
+        self.penalty /= 2
+        if self.penalty < 0.001:
+            self.penalty = 0.0
+
+    def too_fast(self):
+        step = max(self.delay / 10, 0.005)
+        self.penalty = min(self.max_penalty, max(self.penalty * 2, step))
@@ -0,0 +1,421 @@
+import logging
+from dataclasses import dataclass, field
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Dict, Optional
+
+from game.api import MoveTooFastError
+from game.board_handler import AsyncBoardHandler, BoardHandler
+from game.board_state import AsyncSharedBoards, SharedBoards
+from game.bot_handler import AsyncBotHandler, BotHandler
+from game.logic.base import BaseLogic
+from game.models import Board, Bot, GameObject
+from game.pacing import MovePacer
+from game.precompute import Decision, Precomputer
+from game.telemetry import RequestTiming, Telemetry, TickRecord, milliseconds
+
+if TYPE_CHECKING:
+    from game.recording import Recorder
+
+# How often a waiting bot looks for a newer shared board, in seconds
+POLL_INTERVAL = 0.005
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PlayStats:
+    moves: int = 0
+    too_fast: int = 0
+    invalid_moves: int = 0
+    errors: int = 0
+    score: int = 0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    # Monotonic time the server accepted the first move
+    first_move_at: float = 0.0
+    logic: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+    @property
+    def moves_per_second(self) -> float:
+        return self.moves / self.duration if self.duration > 0 else 0.0
+
+    def update_score(self, board: Optional[Board], bot: Bot):
+        board_bot = board.get_bot(bot) if board else None
+        if board_bot and board_bot.properties.score is not None:
+            self.score = board_bot.properties.score
+
+
+def format_logic_stats(stats: PlayStats) -> str:
+    return " ".join("{}={}".format(key, value) for key, value in stats.logic.items())
+
+
+def format_startup(started_at: float, phases: Dict[str, float], stats: PlayStats) -> str:
+    """
+    Time from started_at to the first accepted move, split in phases
+    :param phases: name and monotonic end time of every phase before playing, in order
+    :return: str
+    """
+    if not stats.first_move_at:
+        return "Time to first move: no move was accepted"
+    parts = []
+    previous = started_at
+    for name, ended in list(phases.items()) + [("first move", stats.first_move_at)]:
+        parts.append("{} {:.0f}ms".format(name, (ended - previous) * 1000))
+        previous = ended
+    return "Time to first move: {:.0f}ms ({})".format(
+        (stats.first_move_at - started_at) * 1000, ", ".join(parts)
+    )
+
+
+def _warn_invalid_move(board_bot, delta_x: int, delta_y: int):
+    logger.warning(
+        "Invalid move will be ignored. Your move: (%s, %s). Your position: (%s, %s)",
+        delta_x,
+        delta_y,
+        board_bot.position.x,
+        board_bot.position.y,
+    )
+
+
+def _record_tick(
+    telemetry: Optional[Telemetry],
+    bot: Bot,
+    tick: int,
+    outcome: str,
+    started: float,
+    decision: float,
+    slept: float,
+    timing: Optional[RequestTiming] = None,
+):
+    if telemetry is None:
+        return
+    telemetry.record(
+        TickRecord(
+            bot=bot.name,
+            tick=tick,
+            outcome=outcome,
+            decision=milliseconds(decision),
+            http=milliseconds(timing.http) if timing else 0.0,
+            decode=milliseconds(timing.decode) if timing else 0.0,
+            sleep=milliseconds(slept),
+            tick_time=milliseconds(monotonic() - started),
+        )
+    )
+
+
+def _precomputed_move(
+    precomputer: Precomputer,
+    pacer: MovePacer,
+    bot: Bot,
+    board_id: int,
+    board_bot: GameObject,
+    board: Board,
+    shared_boards: Optional[SharedBoards],
+) -> Decision:
+    # Wait for the tick while the worker decides, following newer boards
+    # that the other bots received meanwhile
+    decisions = [precomputer.start(board_bot, board, pacer.deadline())]
+    while True:
+        remaining = pacer.remaining()
+        if remaining <= 0:
+            break
+        if not shared_boards:
+            sleep(remaining)
+            continue
+        newer = shared_boards.current(board_id)
+        if newer is not None and newer is not decisions[-1].board:
+            newer_bot = newer.get_bot(bot)
+            if newer_bot:
+                decisions.append(precomputer.start(newer_bot, newer, pacer.deadline()))
+        sleep(min(remaining, POLL_INTERVAL))
+    return precomputer.freshest(decisions)
+
+
+async def _precomputed_move_async(
+    precomputer: Precomputer,
+    pacer: MovePacer,
+    bot: Bot,
+    board_id: int,
+    board_bot: GameObject,
+    board: Board,
+    shared_boards: Optional[AsyncSharedBoards],
+) -> Decision:
+    import asyncio
+
+    decisions = [precomputer.start(board_bot, board, pacer.deadline())]
+    while True:
+        remaining = pacer.remaining()
+        if remaining <= 0:
+            break
+        if not shared_boards:
+            await asyncio.sleep(remaining)
+            continue
+        newer = shared_boards.current(board_id)
+        if newer is not None and newer is not decisions[-1].board:
+            newer_bot = newer.get_bot(bot)
+            if newer_bot:
+                decisions.append(precomputer.start(newer_bot, newer, pacer.deadline()))
+        await asyncio.sleep(min(remaining, POLL_INTERVAL))
+    return precomputer.freshest(decisions)
+
+
+def play(
+    bot: Bot,
+    board_id: int,
+    bot_logic: BaseLogic,
+    bot_handler: BotHandler,
+    board_handler: BoardHandler,
+    time_factor: float = 1,
+    shared_boards: Optional[SharedBoards] = None,
+    precompute: bool = False,
+    telemetry: Optional[Telemetry] = None,
+    recorder: Optional["Recorder"] = None,
+) -> PlayStats:
+    """
+    Play on a joined board until our bot is no longer on it. With
+    shared_boards, the board snapshot is shared with the other bots of the
+    process: every move response replaces it and at most one bot fetches it
+    per tick. With precompute, moves are decided in a worker thread during
+    the move delay, see Precomputer. With telemetry, the time every tick
+    spends deciding, waiting for the server, decoding and sleeping is
+    recorded. With recorder, every board decided on and its move are
+    appended to a recording.
+    """
+    stats = PlayStats(started_at=monotonic())
+    board_source = shared_boards or board_handler
+    board = board_source.get_board(board_id)
+    pacer = MovePacer(board.minimum_delay_between_moves, time_factor)
+    precomputer = Precomputer(bot_logic) if precompute else None
+    tick = 0
+
+    while True:
+        if shared_boards:
+            # Another bot may have received a newer board since our last move
+            board = shared_boards.current(board_id) or board
+
+        # Find our info among the bots on the board
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            # Managed to get game over
+            break
+
+        # Calculate next move, using the time left until the next move may be sent
+        tick += 1
+        started = monotonic()
+        if precomputer:
+            decision = _precomputed_move(
+                precomputer, pacer, bot, board_id, board_bot, board, shared_boards
+            )
+            slept = monotonic() - started
+            board_bot, board = decision.board_bot, decision.board
+            delta_x, delta_y = decision.future.result()
+            decided = monotonic() - started - slept
+        else:
+            bot_logic.deadline = pacer.deadline()
+            delta_x, delta_y = bot_logic.next_move(board_bot, board)
+            decided, slept = monotonic() - started, 0.0
+        if recorder:
+            recorder.record(bot.name, tick, board, delta_x, delta_y)
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            _warn_invalid_move(board_bot, delta_x, delta_y)
+            stats.invalid_moves += 1
+            pause = pacer.skipped()
+            slept += pause
+            sleep(pause)
+            # Keep the board we have if the server does not send a new one
+            board = board_source.get_board(board_id) or board
+            _record_tick(telemetry, bot, tick, "invalid", started, decided, slept)
+            continue
+
+        # Don't spam the board more than it allows!
+        waited = monotonic()
+        pacer.wait()
+        slept += monotonic() - waited
+        pacer.sent()
+        if precomputer:
+            # Decide the next move on the board we expect back, until it is in
+            precomputer.speculate(
+                board_bot, board, delta_x, delta_y, monotonic() + pacer.latency
+            )
+        try:
+            # Try to perform move
+            board = bot_handler.move(bot.id, board_id, delta_x, delta_y)
+        except MoveTooFastError:
+            pacer.received()
+            pacer.too_fast()
+            stats.too_fast += 1
+            _record_tick(
+                telemetry,
+                bot,
+                tick,
+                "too_fast",
+                started,
+                decided,
+                slept,
+                bot_handler.api.last_timing,
+            )
+            continue
+        except Exception as e:
+            stats.errors += 1
+            _record_tick(telemetry, bot, tick, "error", started, decided, slept)
+            break
+        pacer.received()
+        pacer.accepted()
+        stats.moves += 1
+        if stats.moves == 1:
+            stats.first_move_at = monotonic()
+        _record_tick(
+            telemetry,
+            bot,
+            tick,
+            "ok",
+            started,
+            decided,
+            slept,
+            bot_handler.api.last_timing,
+        )
+
+        if board and shared_boards:
+            shared_boards.publish(board)
+        if not board:
+            # Read new board state
+            board = board_source.get_board(board_id)
+        stats.update_score(board, bot)
+
+    stats.finished_at = monotonic()
+    if precomputer:
+        precomputer.close()
+    stats.logic = bot_logic.stats()
+    if precomputer:
+        stats.logic.update(precomputer.stats())
+    return stats
+
+
+async def play_async(
+    bot: Bot,
+    board_id: int,
+    bot_logic: BaseLogic,
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    time_factor: float = 1,
+    shared_boards: Optional[AsyncSharedBoards] = None,
+    precompute: bool = False,
+    telemetry: Optional[Telemetry] = None,
+    recorder: Optional["Recorder"] = None,
+) -> PlayStats:
+    """
+    Same as play, but waits for the server and the move delay without
+    blocking the event loop, so several bots can play concurrently
+    """
+    # Imported here, so bots playing with play start without asyncio
+    import asyncio
+
+    stats = PlayStats(started_at=monotonic())
+    board_source = shared_boards or board_handler
+    board = await board_source.get_board(board_id)
+    pacer = MovePacer(board.minimum_delay_between_moves, time_factor)
+    precomputer = Precomputer(bot_logic) if precompute else None
+    tick = 0
+
+    while True:
+        if shared_boards:
+            board = shared_boards.current(board_id) or board
+
+        board_bot = board.get_bot(bot)
+        if not board_bot:
+            break
+
+        tick += 1
+        started = monotonic()
+        if precomputer:
+            decision = await _precomputed_move_async(
+                precomputer, pacer, bot, board_id, board_bot, board, shared_boards
+            )
+            slept = monotonic() - started
+            board_bot, board = decision.board_bot, decision.board
+            delta_x, delta_y = await asyncio.wrap_future(decision.future)
+            decided = monotonic() - started - slept
+        else:
+            bot_logic.deadline = pacer.deadline()
+            # Logics may think until the deadline, off the loop so the other
+            # bots on it keep moving meanwhile
+            delta_x, delta_y = await asyncio.get_running_loop().run_in_executor(
+                None, bot_logic.next_move, board_bot, board
+            )
+            decided, slept = monotonic() - started, 0.0
+        if recorder:
+            recorder.record(bot.name, tick, board, delta_x, delta_y)
+        if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+            _warn_invalid_move(board_bot, delta_x, delta_y)
+            stats.invalid_moves += 1
+            pause = pacer.skipped()
+            slept += pause
+            await asyncio.sleep(pause)
+            board = await board_source.get_board(board_id) or board
+            _record_tick(telemetry, bot, tick, "invalid", started, decided, slept)
+            continue
+
+        waited = monotonic()
+        await asyncio.sleep(pacer.remaining())
+        slept += monotonic() - waited
+        pacer.sent()
+        if precomputer:
+            # Decide the next move on the board we expect back, until it is in
+            precomputer.speculate(
+                board_bot, board, delta_x, delta_y, monotonic() + pacer.latency
+            )
+        try:
+            board = await bot_handler.move(bot.id, board_id, delta_x, delta_y)
+        except MoveTooFastError:
+            pacer.received()
+            pacer.too_fast()
+            stats.too_fast += 1
+            _record_tick(
+                telemetry,
+                bot,
+                tick,
+                "too_fast",
+                started,
+                decided,
+                slept,
+                bot_handler.api.last_timing,
+            )
+            continue
+        except Exception as e:
+            stats.errors += 1
+            _record_tick(telemetry, bot, tick, "error", started, decided, slept)
+            break
+        pacer.received()
+        pacer.accepted()
+        stats.moves += 1
+        if stats.moves == 1:
+            stats.first_move_at = monotonic()
+        _record_tick(
+            telemetry,
+            bot,
+            tick,
+            "ok",
+            started,
+            decided,
+            slept,
+            bot_handler.api.last_timing,
+        )
+
+        if board and shared_boards:
+            shared_boards.publish(board)
+        if not board:
+            board = await board_source.get_board(board_id)
+        stats.update_score(board, bot)
+
+    stats.finished_at = monotonic()
+    if precomputer:
+        # Waits for the decision still running, off the loop
+        await asyncio.get_running_loop().run_in_executor(None, precomputer.close)
+    stats.logic = bot_logic.stats()
+    if precomputer:
+        stats.logic.update(precomputer.stats())
+    return stats
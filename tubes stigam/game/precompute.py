@@ -0,0 +1,153 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+
+
+@dataclass
+class Decision:
+    board_bot: GameObject
+    board: Board
+    future: Future
+
+
+def board_signature(board: Board) -> Tuple:
+    """
+    What a move decision may depend on: where every object is and how many
+    diamonds every bot carries
+    """
+    return tuple(
+        (
+            obj.id,
+            obj.position.x,
+            obj.position.y,
+            # Only bots carry diamonds, the properties of others stay unread
+            obj.properties.diamonds
+            if obj.type == "BotGameObject" and obj.properties
+            else None,
+        )
+        for obj in board.game_objects or []
+    )
+
+
+def predict_board(board: Board, board_bot: GameObject, delta_x: int, delta_y: int) -> Board:
+    """
+    The board we expect back from the server when our move lands on an empty
+    cell and nobody else moves
+    """
+    moved = GameObject(
+        id=board_bot.id,
+        position=Position(y=board_bot.position.y + delta_y, x=board_bot.position.x + delta_x),
+        type=board_bot.type,
+        properties=board_bot.properties,
+    )
+    return Board(
+        id=board.id,
+        width=board.width,
+        height=board.height,
+        features=board.features,
+        minimum_delay_between_moves=board.minimum_delay_between_moves,
+        game_objects=[
+            moved if obj is board_bot else obj for obj in board.game_objects or []
+        ],
+    )
+
+
+class Precomputer:
+    """
+    Runs next_move in a worker thread, so decisions are made while the game
+    loop waits for the move delay or for the server.
+
+    Right after a move is sent, the next decision is computed speculatively
+    on the board we expect back, by a fork of the logic. If the real board
+    matches, its decision is ready as soon as the response arrives and the
+    logic takes over the state of the fork. Otherwise the fork is dropped,
+    so a board that never came leaves no trace in the logic or its stats.
+    All decisions run on the one worker thread, so they never overlap.
+    """
+
+    def __init__(self, bot_logic: BaseLogic):
+        self.bot_logic = bot_logic
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precompute")
+        self._speculation: Optional[Tuple[Tuple, Future, BaseLogic]] = None
+        self.decisions = 0
+        self.speculative_hits = 0
+        self.speculative_misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def _next_move(
+        bot_logic: BaseLogic, board_bot: GameObject, board: Board, deadline: float
+    ) -> Tuple[int, int]:
+        bot_logic.deadline = deadline
+        return bot_logic.next_move(board_bot, board)
+
+    def _adopt(self, fork: BaseLogic, future: Future) -> Tuple[int, int]:
+        # Queued behind the speculative decision, so it is done by now
+        move = future.result()
+        self.bot_logic.adopt(fork)
+        return move
+
+    def start(self, board_bot: GameObject, board: Board, deadline: float) -> Decision:
+        """
+        Start deciding on the given board, or reuse the speculative decision
+        when the board is the one that was expected
+        """
+        speculation, self._speculation = self._speculation, None
+        if speculation is not None:
+            signature, future, fork = speculation
+            if signature == board_signature(board):
+                self.speculative_hits += 1
+                return Decision(board_bot, board, self.executor.submit(self._adopt, fork, future))
+            self.speculative_misses += 1
+            future.cancel()
+        self.decisions += 1
+        return Decision(
+            board_bot,
+            board,
+            self.executor.submit(self._next_move, self.bot_logic, board_bot, board, deadline),
+        )
+
+    def speculate(
+        self, board_bot: GameObject, board: Board, delta_x: int, delta_y: int, deadline: float
+    ):
+        """
+        Start deciding on the board expected after the move that was just sent
+        """
+        predicted = predict_board(board, board_bot, delta_x, delta_y)
+        moved = predicted.get_object(board_bot.id)
+        fork = self.bot_logic.fork()
+        self._speculation = (
+            board_signature(predicted),
+            self.executor.submit(self._next_move, fork, moved, predicted, deadline),
+            fork,
+        )
+
+    def freshest(self, decisions: List[Decision]) -> Decision:
+        """
+        The decision on the newest board that is already done. When none is,
+        the newest one, which the caller has to wait for.
+        """
+        for decision in reversed(decisions):
+            if decision.future.done():
+                if decision is not decisions[-1]:
+                    self.stale += 1
+                return decision
+        return decisions[-1]
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "precompute_decisions": self.decisions,
+            "speculative_hits": self.speculative_hits,
+            "speculative_misses": self.speculative_misses,
+            "stale_decisions": self.stale,
+        }
+
+    def close(self):
+        """
+        Cancel decisions not started yet and wait for the running one, so the
+        logic is left alone once its stats are read
+        """
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,342 @@
+"""
+Compact binary recording of games: every board a bot decided on and the
+move it chose, appended to one file.
+
+The file starts with MAGIC and holds a stream of records, each starting with
+a one byte tag:
+
+    G  session   a run of the recorder, resets the string table
+    S  string    the next entry of the string table, utf-8
+    B  snapshot  a board, our move, and one fixed-size record per object
+
+Names, types and teleporter pairs are stored once per session in the string
+table and referred to by index. A recording cut short by a crash ends at its
+last complete record; the next Recorder on the file cuts off the rest.
+
+    python -m game.recording games.rec      summary of a recording
+"""
+import argparse
+import logging
+import mmap
+import os
+import struct
+from collections import deque
+from dataclasses import dataclass
+from time import time
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from game.models import Base, Board, GameObject, Position, Properties
+
+MAGIC = b"DIAREC1\n"
+SESSION = b"G"
+STRING = b"S"
+SNAPSHOT = b"B"
+
+_SESSION = struct.Struct("<d")  # started, unix time
+_STRING = struct.Struct("<H")  # length
+# bot, tick, unix time, board id, width, height, objects, move x, move y
+_SNAPSHOT = struct.Struct("<HIdIHHHbb")
+# id, type, x, y, points, diamonds, score, name, inventory size,
+# milliseconds left, base x, base y, pair id
+OBJECT = struct.Struct("<IHhhhhiHhihhH")
+
+# Stands for None in integer fields and string references
+NONE = -1
+NO_STRING = 0xFFFF
+
+logger = logging.getLogger(__name__)
+
+
+def _int(value: Optional[int]) -> int:
+    return NONE if value is None else value
+
+
+def _optional(value: int) -> Optional[int]:
+    return None if value == NONE else value
+
+
+class Recorder:
+    """
+    Appends snapshots to a recording. Every Recorder starts a new session, so
+    several runs can go to the same file. Bots of a roster can share one.
+    """
+
+    def __init__(self, path: str):
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size:
+            with Recording(path) as recording:
+                deque(recording, maxlen=0)
+                complete = recording.complete
+            if complete < size:
+                os.truncate(path, complete)
+        self.file: BinaryIO = open(path, "ab")
+        if not size:
+            self.file.write(MAGIC)
+        self.file.write(SESSION + _SESSION.pack(time()))
+        self._strings: Dict[str, int] = {}
+        self.snapshots = 0
+        self.errors = 0
+
+    def _string(self, value: Optional[str], out: bytearray) -> int:
+        if value is None:
+            return NO_STRING
+        index = self._strings.get(value)
+        if index is None:
+            index = len(self._strings)
+            if index >= NO_STRING:
+                raise ValueError("Too many distinct strings in one session")
+            self._strings[value] = index
+            data = value.encode()
+            out += STRING + _STRING.pack(len(data)) + data
+        return index
+
+    def record(self, bot_name: str, tick: int, board: Board, delta_x: int, delta_y: int):
+        """
+        Append the board our bot decided on in this tick and its move. A
+        snapshot that does not fit the format is logged and skipped, so the
+        recording never ends a game.
+        """
+        strings = len(self._strings)
+        out = bytearray()
+        try:
+            self._pack(bot_name, tick, board, delta_x, delta_y, out)
+        except (struct.error, ValueError) as e:
+            # Strings of the skipped snapshot were never written
+            for value, index in list(self._strings.items()):
+                if index >= strings:
+                    del self._strings[value]
+            self.errors += 1
+            logger.warning("Not recording tick %d of %s: %s", tick, bot_name, e)
+            return
+        self.file.write(out)
+        self.snapshots += 1
+
+    def _pack(
+        self, bot_name: str, tick: int, board: Board, delta_x: int, delta_y: int, out: bytearray
+    ):
+        bot = self._string(bot_name, out)
+        game_objects = board.game_objects or []
+        body = bytearray(OBJECT.size * len(game_objects))
+        for i, obj in enumerate(game_objects):
+            props = obj.properties or Properties()
+            base = props.base
+            OBJECT.pack_into(
+                body,
+                i * OBJECT.size,
+                obj.id,
+                self._string(obj.type, out),
+                obj.position.x,
+                obj.position.y,
+                _int(props.points),
+                _int(props.diamonds),
+                _int(props.score),
+                self._string(props.name, out),
+                _int(props.inventory_size),
+                _int(props.milliseconds_left),
+                base.x if base else NONE,
+                base.y if base else NONE,
+                self._string(props.pair_id, out),
+            )
+        out += SNAPSHOT + _SNAPSHOT.pack(
+            bot,
+            tick,
+            time(),
+            board.id,
+            board.width,
+            board.height,
+            len(game_objects),
+            delta_x,
+            delta_y,
+        )
+        out += body
+
+    def close(self):
+        self.file.close()
+
+
+@dataclass
+class Snapshot:
+    """
+    One recorded tick. objects is a view into the mapped file, so reading a
+    snapshot copies nothing until its objects are unpacked.
+    """
+
+    session: int
+    bot: str
+    tick: int
+    time: float
+    board_id: int
+    width: int
+    height: int
+    move: Tuple[int, int]
+    objects: memoryview
+    strings: List[str]
+
+    def raw_objects(self) -> Iterator[Tuple]:
+        """
+        The fields of every object as OBJECT unpacks them, strings as indexes
+        into strings
+        """
+        return OBJECT.iter_unpack(self.objects)
+
+    def board(self) -> Board:
+        """
+        The recorded board. Features, the move delay and the fields of
+        Properties not in OBJECT are not recorded and left empty.
+        """
+        strings = self.strings
+
+        def string(index: int) -> Optional[str]:
+            return None if index == NO_STRING else strings[index]
+
+        game_objects = []
+        for (
+            id,
+            type,
+            x,
+            y,
+            points,
+            diamonds,
+            score,
+            name,
+            inventory_size,
+            milliseconds_left,
+            base_x,
+            base_y,
+            pair_id,
+        ) in self.raw_objects():
+            properties = Properties(
+                points=_optional(points),
+                pair_id=string(pair_id),
+                diamonds=_optional(diamonds),
+                score=_optional(score),
+                name=string(name),
+                inventory_size=_optional(inventory_size),
+                milliseconds_left=_optional(milliseconds_left),
+                base=None if base_x == NONE else Base(y=base_y, x=base_x),
+            )
+            game_objects.append(
+                GameObject(
+                    id=id,
+                    position=Position(y=y, x=x),
+                    type=strings[type],
+                    properties=None if properties == Properties() else properties,
+                )
+            )
+        return Board(
+            id=self.board_id,
+            width=self.width,
+            height=self.height,
+            features=[],
+            minimum_delay_between_moves=0,
+            game_objects=game_objects,
+        )
+
+
+class Recording:
+    """
+    Reads a recording through a memory map. Snapshots refer to the mapped
+    file, so drop them before closing the recording.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("Not a recording: {}".format(path))
+        # End of the last complete record read so far
+        self.complete = len(MAGIC)
+
+    def __iter__(self) -> Iterator[Snapshot]:
+        view = memoryview(self._map)
+        end = len(view)
+        offset = len(MAGIC)
+        session = 0
+        strings: List[str] = []
+        while offset < end:
+            tag = view[offset : offset + 1]
+            offset += 1
+            if tag == SESSION:
+                if offset + _SESSION.size > end:
+                    break
+                offset += _SESSION.size
+                session += 1
+                strings = []
+                self.complete = offset
+            elif tag == STRING:
+                if offset + _STRING.size > end:
+                    break
+                (length,) = _STRING.unpack_from(view, offset)
+                offset += _STRING.size
+                if offset + length > end:
+                    break
+                strings.append(str(view[offset : offset + length], "utf-8"))
+                offset += length
+                self.complete = offset
+            elif tag == SNAPSHOT:
+                if offset + _SNAPSHOT.size > end:
+                    break
+                bot, tick, at, board_id, width, height, count, dx, dy = (
+                    _SNAPSHOT.unpack_from(view, offset)
+                )
+                offset += _SNAPSHOT.size
+                size = count * OBJECT.size
+                if offset + size > end:
+                    break
+                self.complete = offset + size
+                yield Snapshot(
+                    session=session,
+                    bot=strings[bot],
+                    tick=tick,
+                    time=at,
+                    board_id=board_id,
+                    width=width,
+                    height=height,
+                    move=(dx, dy),
+                    objects=view[offset : offset + size],
+                    strings=strings,
+                )
+                offset += size
+            else:
+                raise ValueError(
+                    "Unknown record {!r} at byte {} of {}".format(
+                        bytes(tag), offset - 1, self.path
+                    )
+                )
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> "Recording":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize a game recording")
+    parser.add_argument("path", help="Recording written with main.py --record")
+    args = parser.parse_args()
+
+    sessions = set()
+    ticks: Dict[str, int] = {}
+    objects = 0
+    with Recording(args.path) as recording:
+        for snapshot in recording:
+            sessions.add(snapshot.session)
+            ticks[snapshot.bot] = ticks.get(snapshot.bot, 0) + 1
+            objects += len(snapshot.objects) // OBJECT.size
+            del snapshot
+    size = os.path.getsize(args.path)
+    snapshots = sum(ticks.values())
+    print(
+        "{} sessions, {} snapshots, {} objects, {} bytes ({:.0f} bytes per snapshot)".format(
+            len(sessions), snapshots, objects, size, size / snapshots if snapshots else 0
+        )
+    )
+    for bot, count in sorted(ticks.items()):
+        print("{:<16} {:>7} ticks".format(bot, count))
@@ -0,0 +1,228 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional
+
+from colorama import Fore, Style
+from dacite import from_dict
+from game.api import Api, AsyncApi
+from game.board_handler import AsyncBoardHandler
+from game.board_state import AsyncSharedBoards
+from game.bot_handler import AsyncBotHandler
+from game.controllers import CONTROLLERS, load_controller
+from game.models import Bot
+from game.play import PlayStats, format_logic_stats, play_async
+from game.telemetry import Telemetry
+from game.token_cache import TokenCache
+
+if TYPE_CHECKING:
+    from game.recording import Recorder
+
+
+@dataclass
+class RosterEntry:
+    name: str
+    email: str
+    password: str
+    team: str
+    logic: str
+    board: Optional[int] = None
+
+
+@dataclass
+class RosterResult:
+    entry: RosterEntry
+    board_id: Optional[int] = None
+    stats: Optional[PlayStats] = None
+    error: Optional[str] = None
+
+
+def load_roster(path: str) -> List[RosterEntry]:
+    """
+    Read a roster file: a JSON list of bots, each with name, email, password,
+    team, logic and optionally the board to join
+    :param path: str
+    :return: list of RosterEntry
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return [from_dict(RosterEntry, item) for item in data]
+
+
+async def _sign_in(
+    bot_handler: AsyncBotHandler, entry: RosterEntry, token_cache: Optional[TokenCache]
+) -> Optional[Bot]:
+    token = await bot_handler.recover(entry.email, entry.password)
+    if not token:
+        bot = await bot_handler.register(
+            entry.name, entry.email, entry.password, entry.team
+        )
+        if not bot:
+            return None
+        token = bot.id
+    bot = await bot_handler.get_my_info(token)
+    if token_cache and bot and bot.name:
+        token_cache.put(bot_handler.api.api.url, entry.email, bot)
+    return bot
+
+
+async def _join(
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    bot: Bot,
+    board_id: int,
+) -> Optional[int]:
+    if board_id:
+        if await bot_handler.join(bot.id, board_id):
+            return board_id
+        return None
+
+    for board in await board_handler.probe_boards():
+        if await bot_handler.join(bot.id, board.id):
+            return board.id
+    return None
+
+
+async def _run_entry(
+    entry: RosterEntry,
+    bot_handler: AsyncBotHandler,
+    board_handler: AsyncBoardHandler,
+    shared_boards: AsyncSharedBoards,
+    board_id: int,
+    time_factor: float,
+    precompute: bool,
+    telemetry: Optional[Telemetry],
+    token_cache: Optional[TokenCache],
+    recorder: Optional["Recorder"],
+) -> RosterResult:
+    result = RosterResult(entry)
+    if entry.logic not in CONTROLLERS:
+        result.error = "Invalid logic controller"
+        return result
+
+    # A bot signed in before skips recovering its token and looking up its name
+    host = bot_handler.api.api.url
+    bot = token_cache.get(host, entry.email) if token_cache else None
+    if bot:
+        result.board_id = await _join(
+            bot_handler, board_handler, bot, entry.board or board_id
+        )
+        if not result.board_id and not await bot_handler.get_my_info(bot.id):
+            # The server does not know the cached token (anymore)
+            token_cache.forget(host, entry.email)
+            bot = None
+
+    if not bot:
+        bot = await _sign_in(bot_handler, entry, token_cache)
+        if not bot or not bot.name:
+            result.error = "Unable to register bot"
+            return result
+        result.board_id = await _join(
+            bot_handler, board_handler, bot, entry.board or board_id
+        )
+    if not result.board_id:
+        result.error = "Unable to find any boards to join"
+        return result
+
+    bot_logic = load_controller(entry.logic)()
+    result.stats = await play_async(
+        bot,
+        result.board_id,
+        bot_logic,
+        bot_handler,
+        board_handler,
+        time_factor,
+        shared_boards,
+        precompute,
+        telemetry,
+        recorder,
+    )
+    return result
+
+
+async def run_roster(
+    entries: List[RosterEntry],
+    api: Api,
+    board_id: int,
+    time_factor: float = 1,
+    precompute: bool = False,
+    telemetry: Optional[Telemetry] = None,
+    token_cache: Optional[TokenCache] = None,
+    recorder: Optional["Recorder"] = None,
+) -> List[RosterResult]:
+    """
+    Sign in, join and play every bot of the roster concurrently on one event
+    loop, sharing the connection pool of the given client and the board
+    snapshots. The ticks of every bot are recorded in the one telemetry and
+    the one recorder, and bots found in the token cache join without signing
+    in.
+    """
+    async_api = AsyncApi(api)
+    bot_handler = AsyncBotHandler(async_api)
+    board_handler = AsyncBoardHandler(async_api)
+    shared_boards = AsyncSharedBoards(board_handler)
+    try:
+        outcomes = await asyncio.gather(
+            *(
+                _run_entry(
+                    entry,
+                    bot_handler,
+                    board_handler,
+                    shared_boards,
+                    board_id,
+                    time_factor,
+                    precompute,
+                    telemetry,
+                    token_cache,
+                    recorder,
+                )
+                for entry in entries
+            ),
+            return_exceptions=True,
+        )
+    finally:
+        async_api.close()
+
+    results = []
+    for entry, outcome in zip(entries, outcomes):
+        if isinstance(outcome, BaseException):
+            outcome = RosterResult(entry, error=repr(outcome))
+        results.append(outcome)
+    return results
+
+
+def print_roster_stats(results: List[RosterResult]):
+    print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+    print(
+        "{:<16} {:<10} {:>6} {:>6} {:>6} {:>8} {:>7} {:>9} {:>7}".format(
+            "bot", "logic", "board", "score", "moves", "too fast", "invalid", "moves/s", "time"
+        )
+    )
+    for result in results:
+        entry = result.entry
+        if result.error:
+            print(
+                "{:<16} {:<10} ".format(entry.name, entry.logic)
+                + Fore.RED
+                + Style.BRIGHT
+                + "Error: "
+                + Style.RESET_ALL
+                + result.error
+            )
+            continue
+        stats = result.stats
+        print(
+            "{:<16} {:<10} {:>6} {:>6} {:>6} {:>8} {:>7} {:>9.2f} {:>6.1f}s".format(
+                entry.name,
+                entry.logic,
+                result.board_id,
+                stats.score,
+                stats.moves,
+                stats.too_fast,
+                stats.invalid_moves,
+                stats.moves_per_second,
+                stats.duration,
+            )
+        )
+        if stats.logic:
+            print("{:<16} {}".format("", format_logic_stats(stats)))
@@ -0,0 +1,236 @@
+import argparse
+import json
+import threading
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from game.engine import EngineConfig, GameClock, GameEngine, GameError
+
+DIRECTIONS = {"NORTH": (0, -1), "SOUTH": (0, 1), "EAST": (1, 0), "WEST": (-1, 0)}
+
+
+@dataclass
+class Account:
+    token: str
+    name: str
+    email: str
+    password: str
+    team: str
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    """
+    A local stand-in for the game server, with one GameEngine per board.
+    It answers every endpoint Api uses, in the same shape:
+
+        POST /api/bots                   register
+        POST /api/bots/recover           token of a registered bot
+        GET  /api/bots/{token}           bot info
+        POST /api/bots/{token}/join      join a board
+        POST /api/bots/{token}/move      move, answers the new board
+        GET  /api/boards                 all boards
+        GET  /api/boards/{id}            one board
+
+    Requests are handled on their own threads, the games behind one lock.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], engines: List[GameEngine]):
+        super().__init__(address, _Handler)
+        self.engines: Dict[int, GameEngine] = {e.board_id: e for e in engines}
+        self.accounts: Dict[str, Account] = {}
+        self.lock = threading.Lock()
+
+    def _engine_of(self, token: str) -> Optional[GameEngine]:
+        for engine in self.engines.values():
+            if token in engine.bots:
+                return engine
+        return None
+
+    def handle_api(self, method: str, parts: List[str], body: dict) -> Tuple[int, object]:
+        """
+        Answer one request
+        :param parts: path below /api, split on /
+        :return: HTTP status and the data to send
+        """
+        with self.lock:
+            if method == "GET" and parts == ["boards"]:
+                return 200, [engine.to_json() for engine in self.engines.values()]
+            if method == "GET" and len(parts) == 2 and parts[0] == "boards":
+                engine = self.engines.get(int(parts[1])) if parts[1].isdigit() else None
+                if engine is None:
+                    return 404, _error(404, "Board not found")
+                return 200, engine.to_json()
+            if method == "POST" and parts == ["bots"]:
+                return self._register(body)
+            if method == "POST" and parts == ["bots", "recover"]:
+                for account in self.accounts.values():
+                    if (account.email, account.password) == (
+                        body.get("email"),
+                        body.get("password"),
+                    ):
+                        return 201, {"id": account.token}
+                return 404, _error(404, "Bot not found")
+            if len(parts) >= 2 and parts[0] == "bots":
+                account = self.accounts.get(parts[1])
+                if account is None:
+                    return 404, _error(404, "Bot not found")
+                if method == "GET" and len(parts) == 2:
+                    return 200, _bot_info(account)
+                if method == "POST" and parts[2:] == ["join"]:
+                    return self._join(account, body)
+                if method == "POST" and parts[2:] == ["move"]:
+                    return self._move(account, body)
+            return 404, _error(404, "Not found")
+
+    def _register(self, body: dict) -> Tuple[int, object]:
+        for key in ("name", "email", "password", "team"):
+            if not body.get(key):
+                return 400, _error(400, "Missing {}".format(key))
+        for account in self.accounts.values():
+            if body["email"] == account.email or body["name"] == account.name:
+                return 409, _error(409, "Email or name already exists")
+        account = Account(
+            token=str(uuid.uuid4()),
+            name=body["name"],
+            email=body["email"],
+            password=body["password"],
+            team=body["team"],
+        )
+        self.accounts[account.token] = account
+        return 200, _bot_info(account)
+
+    def _join(self, account: Account, body: dict) -> Tuple[int, object]:
+        engine = self.engines.get(body.get("preferredBoardId"))
+        if engine is None:
+            return 404, _error(404, "Board not found")
+        if self._engine_of(account.token) not in (None, engine):
+            return 409, _error(409, "Bot already plays on another board")
+        try:
+            engine.join(account.token, account.name)
+        except GameError as e:
+            return e.status, _error(e.status, str(e))
+        return 200, {}
+
+    def _move(self, account: Account, body: dict) -> Tuple[int, object]:
+        engine = self._engine_of(account.token)
+        if engine is None:
+            return 403, _error(403, "Bot is not on any board")
+        direction = DIRECTIONS.get(body.get("direction"))
+        if direction is None:
+            return 400, _error(400, "Invalid direction")
+        try:
+            engine.move(account.token, *direction)
+        except GameError as e:
+            return e.status, _error(e.status, str(e))
+        return 200, engine.to_json()
+
+
+def _bot_info(account: Account) -> dict:
+    return {"id": account.token, "name": account.name, "email": account.email}
+
+
+def _error(status: int, message: str) -> dict:
+    return {"statusCode": status, "message": message}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: SimulatorServer
+
+    def _handle(self, method: str):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            body = {}
+        path = self.path.split("?")[0].strip("/").split("/")
+        if path[:1] != ["api"]:
+            status, data = 404, _error(404, "Not found")
+        else:
+            status, data = self.server.handle_api(method, path[1:], body)
+
+        # Errors are sent as they are, everything else wrapped like the server does
+        content = json.dumps(data if status >= 400 else {"data": data}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_server(
+    host: str = "localhost",
+    port: int = 3000,
+    boards: int = 1,
+    speed: float = 1,
+    seed: Optional[int] = None,
+    config: Optional[EngineConfig] = None,
+) -> SimulatorServer:
+    """
+    Build a simulator with the given number of boards, sharing one clock
+    running speed times faster than real time
+    """
+    clock = GameClock(speed)
+    engines = [
+        GameEngine(
+            config,
+            board_id=i + 1,
+            clock=clock,
+            seed=None if seed is None else seed + i,
+        )
+        for i in range(boards)
+    ]
+    return SimulatorServer((host, port), engines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Diamonds game server")
+    parser.add_argument("--host", default="localhost", action="store")
+    parser.add_argument("--port", default=3000, type=int, action="store")
+    parser.add_argument("--boards", help="Number of boards", default=1, type=int)
+    parser.add_argument(
+        "--speed",
+        help="How many times faster than real time the game clock runs. Run the bots with the matching time factor, e.g. --time-factor 0.1 for --speed 10.",
+        default=1,
+        type=float,
+    )
+    parser.add_argument("--seed", help="Seed of the board generation", type=int)
+    parser.add_argument(
+        "--session", help="Seconds every bot may play", default=60, type=int
+    )
+    parser.add_argument(
+        "--delay",
+        help="Minimum delay between moves in milliseconds",
+        default=100,
+        type=int,
+    )
+    args = parser.parse_args()
+
+    server = create_server(
+        args.host,
+        args.port,
+        args.boards,
+        args.speed,
+        args.seed,
+        EngineConfig(session_length=args.session, minimum_delay_between_moves=args.delay),
+    )
+    print("Serving {} board(s) on http://{}:{}/api".format(args.boards, args.host, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,166 @@
+import csv
+import json
+from bisect import bisect_left
+from dataclasses import asdict, dataclass, fields
+from time import monotonic
+from typing import Dict, List, Optional
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS = [0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+PHASES = ["decision", "http", "decode", "sleep", "tick"]
+# Seconds between two live summary lines
+LIVE_INTERVAL = 1.0
+
+
+@dataclass
+class RequestTiming:
+    """
+    Timing of the last request of an Api client, in seconds. decode covers
+    parsing the JSON and building the models.
+    """
+
+    endpoint: str
+    status: int
+    http: float = 0.0
+    decode: float = 0.0
+
+
+@dataclass
+class TickRecord:
+    """
+    Where the time of one tick went, in milliseconds. outcome is ok,
+    too_fast (rejected by the server), invalid (rejected before sending) or
+    error.
+    """
+
+    bot: str
+    tick: int
+    outcome: str
+    decision: float = 0.0
+    http: float = 0.0
+    decode: float = 0.0
+    sleep: float = 0.0
+    tick_time: float = 0.0
+
+
+class Histogram:
+    """
+    Counts of values per bucket, plus the exact count, sum, min and max.
+    Percentiles are estimated as the upper bound of their bucket.
+    """
+
+    def __init__(self, bounds: List[float] = BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        labels = ["<={}".format(bound) for bound in self.bounds] + [
+            ">{}".format(self.bounds[-1])
+        ]
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 3),
+            "min": round(self.min, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": round(self.percentile(50), 3),
+            "p90": round(self.percentile(90), 3),
+            "p99": round(self.percentile(99), 3),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class Telemetry:
+    """
+    Collects a TickRecord for every tick of the game loop, in milliseconds,
+    and aggregates every phase in a histogram. Several bots of a roster can
+    share one instance. With live, a summary line is printed every second.
+    """
+
+    def __init__(self, live: bool = False, keep_ticks: bool = True):
+        self.live = live
+        self.keep_ticks = keep_ticks
+        self.ticks: List[TickRecord] = []
+        self.histograms: Dict[str, Histogram] = {phase: Histogram() for phase in PHASES}
+        self.outcomes: Dict[str, int] = {}
+        self._printed_at = monotonic()
+
+    def record(self, tick: TickRecord):
+        histograms = self.histograms
+        histograms["decision"].add(tick.decision)
+        histograms["sleep"].add(tick.sleep)
+        histograms["tick"].add(tick.tick_time)
+        if tick.outcome in ("ok", "too_fast"):
+            histograms["http"].add(tick.http)
+            histograms["decode"].add(tick.decode)
+        self.outcomes[tick.outcome] = self.outcomes.get(tick.outcome, 0) + 1
+        if self.keep_ticks:
+            self.ticks.append(tick)
+        if self.live and monotonic() - self._printed_at >= LIVE_INTERVAL:
+            self._printed_at = monotonic()
+            print(self.summary())
+
+    def summary(self) -> str:
+        parts = ["ticks={}".format(self.histograms["tick"].count)]
+        for phase in PHASES:
+            histogram = self.histograms[phase]
+            parts.append(
+                "{}={:.1f}/{:.1f}ms".format(
+                    phase, histogram.mean, histogram.percentile(90)
+                )
+            )
+        parts.extend("{}={}".format(k, v) for k, v in self.outcomes.items() if k != "ok")
+        return " ".join(parts) + " (mean/p90)"
+
+    def to_dict(self) -> dict:
+        return {
+            "phases": {phase: h.to_dict() for phase, h in self.histograms.items()},
+            "outcomes": dict(self.outcomes),
+            "ticks": [asdict(tick) for tick in self.ticks],
+        }
+
+    def export(self, path: str):
+        """
+        Write every tick to a CSV file, or everything to a JSON file,
+        depending on the extension of path
+        """
+        with open(path, "w", newline="") as f:
+            if path.endswith(".csv"):
+                writer = csv.writer(f)
+                writer.writerow([field.name for field in fields(TickRecord)])
+                for tick in self.ticks:
+                    writer.writerow(
+                        round(value, 3) if isinstance(value, float) else value
+                        for value in asdict(tick).values()
+                    )
+            else:
+                json.dump(self.to_dict(), f, indent=2)
+
+
+def milliseconds(seconds: Optional[float]) -> float:
+    return seconds * 1000 if seconds else 0.0
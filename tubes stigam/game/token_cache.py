@@ -0,0 +1,59 @@
+import json
+import os
+from typing import Dict, Optional
+
+from game.models import Bot
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "diamonds", "tokens.json")
+
+
+class TokenCache:
+    """
+    Tokens and names of bots signed in before, keyed by email and server, so
+    a known bot can join right away instead of recovering its token and
+    looking up its name first. Passwords are not stored.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._entries: Optional[Dict[str, dict]] = None
+
+    @staticmethod
+    def _key(host: str, email: str) -> str:
+        return "{} {}".format(email, host.rstrip("/"))
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Written next to the file and renamed, so a crash never leaves half a file
+        temp = self.path + ".tmp"
+        with open(os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(temp, self.path)
+
+    def get(self, host: str, email: str) -> Optional[Bot]:
+        entry = self._load().get(self._key(host, email))
+        if entry is None:
+            return None
+        return Bot(name=entry["name"], email=email, id=entry["id"])
+
+    def put(self, host: str, email: str, bot: Bot):
+        self._load()[self._key(host, email)] = {"id": bot.id, "name": bot.name}
+        self._save()
+
+    def forget(self, host: str, email: str):
+        """
+        Drop a token the server no longer accepts
+        """
+        if self._load().pop(self._key(host, email), None) is not None:
+            self._save()
@@ -0,0 +1,219 @@
+import argparse
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Dict, List, Optional
+
+from colorama import Fore, Style
+from game.controllers import CONTROLLERS, load_controller
+from game.engine import EngineConfig, GameEngine, GameError, ManualClock
+
+# Seconds a logic may think per move, the headless stand-in for the move delay
+DEFAULT_BUDGET = 0.005
+
+
+@dataclass
+class GameResult:
+    seed: int
+    # Score of every seat, in line-up order
+    scores: List[int]
+    invalid_moves: List[int]
+
+
+@dataclass
+class LogicSummary:
+    logic: str
+    scores: List[int] = field(default_factory=list)
+    wins: float = 0.0
+    invalid_moves: int = 0
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.scores) if self.scores else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.scores) if len(self.scores) > 1 else 0.0
+
+    def percentile(self, p: float) -> float:
+        if not self.scores:
+            return 0.0
+        ordered = sorted(self.scores)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def play_game(
+    lineup: List[str],
+    seed: int,
+    config: Optional[EngineConfig] = None,
+    budget: float = DEFAULT_BUDGET,
+) -> GameResult:
+    """
+    Play one game between the given logic controllers on a GameEngine,
+    without HTTP and without waiting: the game clock is advanced by the move
+    delay after every bot had its turn
+    :param lineup: names of CONTROLLERS, one bot each
+    :param seed: seeds the board and the logics' random moves
+    :param budget: seconds every logic gets as deadline per move
+    :return: GameResult
+    """
+    random.seed(seed)
+    rng = random.Random(seed)
+    clock = ManualClock()
+    engine = GameEngine(config, clock=clock, seed=seed)
+    delay = engine.config.minimum_delay_between_moves
+
+    tokens = ["bot-{}".format(i) for i in range(len(lineup))]
+    logics = {}
+    for token, name in zip(tokens, lineup):
+        engine.join(token, "{}-{}".format(name, token))
+        logics[token] = load_controller(name)()
+    names = {token: engine.bots[token].name for token in tokens}
+    invalid_moves = {token: 0 for token in tokens}
+
+    while engine.bots:
+        order = list(engine.bots)
+        rng.shuffle(order)
+        for token in order:
+            if token not in engine.bots:
+                continue
+            board = engine.board()
+            board_bot = board.get_bot(engine.bots[token])
+            bot_logic = logics[token]
+            bot_logic.deadline = monotonic() + budget
+            delta_x, delta_y = bot_logic.next_move(board_bot, board)
+            try:
+                engine.move(token, delta_x, delta_y)
+            except GameError:
+                invalid_moves[token] += 1
+        clock.advance(delay)
+        engine.update()
+
+    final = dict(engine.results)
+    return GameResult(
+        seed=seed,
+        scores=[final.get(names[token], 0) for token in tokens],
+        invalid_moves=[invalid_moves[token] for token in tokens],
+    )
+
+
+def _play(args) -> GameResult:
+    return play_game(*args)
+
+
+def seat_labels(lineup: List[str]) -> List[str]:
+    """
+    A label per seat: the logic name, numbered when the logic plays more
+    than one seat, e.g. Stigam#1, Stigam#2, Random
+    """
+    labels = []
+    for i, name in enumerate(lineup):
+        if lineup.count(name) > 1:
+            name = "{}#{}".format(name, lineup[: i + 1].count(name))
+        labels.append(name)
+    return labels
+
+
+def run_tournament(
+    lineup: List[str],
+    games: int,
+    seed: int = 0,
+    workers: Optional[int] = None,
+    config: Optional[EngineConfig] = None,
+    budget: float = DEFAULT_BUDGET,
+) -> Dict[str, LogicSummary]:
+    """
+    Play games seeded seed, seed + 1, ... on a process pool and collect the
+    scores of every logic
+    :param workers: processes to use, defaults to one per core
+    :return: summary per seat, keyed by seat_labels
+    """
+    jobs = [(lineup, seed + i, config, budget) for i in range(games)]
+    labels = seat_labels(lineup)
+    summaries = {label: LogicSummary(label) for label in labels}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(_play, jobs, chunksize=max(1, games // 64)):
+            best = max(result.scores)
+            winners = result.scores.count(best)
+            for label, score, invalid in zip(labels, result.scores, result.invalid_moves):
+                summary = summaries[label]
+                summary.scores.append(score)
+                summary.invalid_moves += invalid
+                if score == best:
+                    summary.wins += 1 / winners
+    return summaries
+
+
+def print_tournament(summaries: Dict[str, LogicSummary], duration: float):
+    # Every seat has one score per game
+    games = len(next(iter(summaries.values())).scores) if summaries else 0
+    print(
+        Fore.BLUE
+        + Style.BRIGHT
+        + "{} games in {:.1f}s ({:.0f} games/min)".format(
+            games, duration, games / duration * 60 if duration else 0
+        )
+        + Style.RESET_ALL
+    )
+    print(
+        "{:<12} {:>7} {:>6} {:>5} {:>5} {:>5} {:>5} {:>7} {:>8}".format(
+            "logic", "mean", "stdev", "min", "p50", "p90", "max", "wins", "invalid"
+        )
+    )
+    for summary in summaries.values():
+        print(
+            "{:<12} {:>7.2f} {:>6.2f} {:>5} {:>5} {:>5} {:>5} {:>7.1f} {:>8}".format(
+                summary.logic,
+                summary.mean,
+                summary.stdev,
+                min(summary.scores, default=0),
+                summary.percentile(50),
+                summary.percentile(90),
+                max(summary.scores, default=0),
+                summary.wins,
+                summary.invalid_moves,
+            )
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play logic controllers against each other without a server"
+    )
+    parser.add_argument(
+        "logics",
+        nargs="+",
+        help="Logic controllers, one bot each. Valid options are: {}".format(
+            ", ".join(CONTROLLERS)
+        ),
+    )
+    parser.add_argument("--games", default=100, type=int, help="Number of games")
+    parser.add_argument("--seed", default=0, type=int, help="Seed of the first game")
+    parser.add_argument("--workers", type=int, help="Processes, default one per core")
+    parser.add_argument(
+        "--session", default=60, type=int, help="Seconds every bot plays"
+    )
+    parser.add_argument(
+        "--budget",
+        default=DEFAULT_BUDGET * 1000,
+        type=float,
+        help="Milliseconds a logic may think per move",
+    )
+    args = parser.parse_args()
+
+    for name in args.logics:
+        if name not in CONTROLLERS:
+            parser.error("Invalid logic controller: {}".format(name))
+
+    started = monotonic()
+    summaries = run_tournament(
+        args.logics,
+        args.games,
+        args.seed,
+        args.workers,
+        EngineConfig(session_length=args.session),
+        args.budget / 1000,
+    )
+    print_tournament(summaries, monotonic() - started)
@@ -1,21 +1,33 @@
+from time import monotonic
+
+# Taken before the other imports, for the time to first move
+STARTED_AT = monotonic()
+
 import argparse
-from time import sleep
+from typing import Optional
 
 from colorama import Back, Fore, Style, init
-from game.api import Api
+from game.api import DEFAULT_POOL_SIZE, DEFAULT_RETRIES, DEFAULT_TIMEOUT, Api
 from game.board_handler import BoardHandler
+from game.board_state import BoardStore
 from game.bot_handler import BotHandler
-from game.logic.random import RandomLogic
+from game.controllers import CONTROLLERS, load_controller
+from game.decoder import LazyBoard, decode_board
+from game.log import configure_logging
+from game.models import Bot
+from game.play import format_logic_stats, format_startup, play
+from game.telemetry import Telemetry
+from game.token_cache import DEFAULT_PATH as DEFAULT_TOKEN_CACHE, TokenCache
 from game.util import *
 from game.logic.base import BaseLogic
-from game.logic.stigam import Stigam
+
+# Modules only some runs need (asyncio, the roster, the logic classes) are
+# imported where they are used, so a bot starts without paying for them
+IMPORTED_AT = monotonic()
 
 init()
 BASE_URL = "http://localhost:3000/api"
 DEFAULT_BOARD_ID = 1
-CONTROLLERS = {
-    "Stigam": Stigam
-}
 
 ###############################################################################
 #
@@ -35,6 +47,19 @@ parser.add_argument(
     "--password", help="The password of the bot to register", action="store"
 )
 parser.add_argument("--team", help="The team of the bot to register", action="store")
+parser.add_argument(
+    "--token-cache",
+    help="File remembering the tokens of bots signed in before, so they can join without signing in again. Default: {}".format(
+        DEFAULT_TOKEN_CACHE
+    ),
+    default=DEFAULT_TOKEN_CACHE,
+    action="store",
+)
+parser.add_argument(
+    "--no-token-cache",
+    help="Always sign in with email and password",
+    action="store_true",
+)
 parser.add_argument(
     "--board", help="Id of the board to join", default=DEFAULT_BOARD_ID, action="store"
 )
@@ -51,28 +76,188 @@ parser.add_argument(
     ),
     action="store",
 )
+parser.add_argument(
+    "--roster",
+    help="A JSON file listing bots (name, email, password, team, logic) to run together in this process",
+    action="store",
+)
+parser.add_argument(
+    "--async",
+    help="Run the game loop on an asyncio event loop",
+    dest="use_async",
+    action="store_true",
+)
+parser.add_argument(
+    "--telemetry",
+    help="Record the timing of every tick and write it to this file at game over, as CSV for a .csv file, otherwise as JSON",
+    action="store",
+)
+parser.add_argument(
+    "--telemetry-live",
+    help="Print a summary line of the tick timings every second",
+    action="store_true",
+)
+parser.add_argument(
+    "--record",
+    help="Append every board the bot decided on and its move to this binary recording, see python -m game.recording",
+    action="store",
+)
+parser.add_argument(
+    "--precompute",
+    help="Decide moves in a worker thread while waiting for the move delay, and speculatively while a move is in flight",
+    action="store_true",
+)
 group = parser.add_argument_group("API connection")
 group.add_argument(
     "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
 )
+group.add_argument(
+    "--timeout",
+    help="Seconds to wait for the server before a request fails. Default: {}".format(
+        DEFAULT_TIMEOUT
+    ),
+    default=DEFAULT_TIMEOUT,
+    action="store",
+)
+group.add_argument(
+    "--retries",
+    help="How many times a request is retried when the connection fails or is reset. Default: {}".format(
+        DEFAULT_RETRIES
+    ),
+    default=DEFAULT_RETRIES,
+    action="store",
+)
+group.add_argument(
+    "--decoder",
+    help="How boards are decoded: full builds every board from scratch, store reuses the objects that did not change since the previous board, lazy only decodes what the logic reads. Default: store",
+    choices=["full", "store", "lazy"],
+    default="store",
+)
+group = parser.add_argument_group("Logging")
+group.add_argument(
+    "--log-level",
+    help="Lowest level of messages to show, DEBUG shows every request. Default: INFO",
+    choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+    default="INFO",
+    type=str.upper,
+)
+group.add_argument(
+    "--quiet",
+    help="Only show errors, without spending any time on other messages",
+    action="store_true",
+)
+group.add_argument(
+    "--log-queue",
+    help="Write messages from a background thread, so a slow console does not delay moves",
+    action="store_true",
+)
 args = parser.parse_args()
+configure_logging(args.log_level, args.quiet, args.log_queue)
+
+time_factor = float(args.time_factor)
+telemetry = None
+if args.telemetry or args.telemetry_live:
+    telemetry = Telemetry(live=args.telemetry_live)
+token_cache = None if args.no_token_cache else TokenCache(args.token_cache)
+
+
+def open_recorder():
+    if not args.record:
+        return None
+    from game.recording import Recorder
+
+    return Recorder(args.record)
+
+
+if args.decoder == "store":
+    board_decoder = BoardStore().decode
+elif args.decoder == "lazy":
+    board_decoder = LazyBoard
+else:
+    board_decoder = decode_board
+
+###############################################################################
+#
+# Run every bot of a roster from this process
+#
+###############################################################################
+if args.roster:
+    import asyncio
+
+    from game.roster import load_roster, print_roster_stats, run_roster
 
-time_factor = int(args.time_factor)
-api = Api(args.host)
+    entries = load_roster(args.roster)
+    api = Api(
+        args.host,
+        pool_size=max(DEFAULT_POOL_SIZE, len(entries)),
+        timeout=float(args.timeout),
+        retries=int(args.retries),
+        board_decoder=board_decoder,
+    )
+    recorder = open_recorder()
+    try:
+        results = asyncio.run(
+            run_roster(
+                entries,
+                api,
+                int(args.board),
+                time_factor,
+                args.precompute,
+                telemetry,
+                token_cache,
+                recorder,
+            )
+        )
+    finally:
+        if recorder:
+            recorder.close()
+    print_roster_stats(results)
+    first_moves = [
+        result.stats.first_move_at
+        for result in results
+        if result.stats and result.stats.first_move_at
+    ]
+    if first_moves:
+        print(
+            "Time to first move: {:.0f}ms to {:.0f}ms (imports {:.0f}ms)".format(
+                (min(first_moves) - STARTED_AT) * 1000,
+                (max(first_moves) - STARTED_AT) * 1000,
+                (IMPORTED_AT - STARTED_AT) * 1000,
+            )
+        )
+    if telemetry:
+        print(telemetry.summary())
+    if args.telemetry:
+        telemetry.export(args.telemetry)
+    exit(0)
+api = Api(
+    args.host,
+    timeout=float(args.timeout),
+    retries=int(args.retries),
+    board_decoder=board_decoder,
+)
 bot_handler = BotHandler(api)
 board_handler = BoardHandler(api)
 
+
+def error(message: str):
+    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + message)
+    exit(1)
+
+
 ###############################################################################
 #
 # (Try and) Register a new bot if we have not supplied a token
 #
 ###############################################################################
-if not args.token:
-    recovered_token = bot_handler.recover(args.email, args.password)
-    args.token = recovered_token
-    if not recovered_token:
-        bot = bot_handler.register(args.name, args.email, args.password, args.team)
-        if bot:
+def sign_in() -> Bot:
+    if not args.token:
+        recovered_token = bot_handler.recover(args.email, args.password)
+        args.token = recovered_token
+        if not recovered_token:
+            bot = bot_handler.register(args.name, args.email, args.password, args.team)
+            if not bot:
+                error("Unable to register bot")
             print("")
             print(
                 Style.BRIGHT
@@ -80,131 +265,112 @@ if not args.token:
                 + Style.RESET_ALL
             )
             args.token = bot.id
-        else:
-            print(
-                Fore.RED
-                + Style.BRIGHT
-                + "Error: "
-                + Style.RESET_ALL
-                + "Unable to register bot"
-            )
-            exit(1)
+
+    bot = bot_handler.get_my_info(args.token)
+    if not bot or not bot.name:
+        error("Bot does not exist")
+    if token_cache and args.email:
+        token_cache.put(args.host, args.email, bot)
+    return bot
+
 
 ###############################################################################
 #
-# Setup bot using token and play game
+# Find a board to join
 #
 ###############################################################################
-bot = bot_handler.get_my_info(args.token)
-logic_controller = args.logic
-if logic_controller not in CONTROLLERS:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "Error: "
-        + Style.RESET_ALL
-        + "Invalid logic controller"
-    )
-    exit(1)
+def join(bot: Bot) -> Optional[int]:
+    board_id = int(args.board)
+    if board_id:
+        # Try to join the one we specified
+        return board_id if bot_handler.join(bot.id, board_id) else None
 
-if not bot.name:
-    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + "Bot does not exist")
-    exit(1)
-print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
+    # Otherwise try every active board, the emptiest with the longest session first
+    for board in board_handler.probe_boards():
+        if bot_handler.join(bot.id, board.id):
+            return board.id
+    return None
 
-# Setup variables
-logic_class = CONTROLLERS[logic_controller]
-bot_logic: BaseLogic = logic_class()
 
 ###############################################################################
 #
-# Find a board to join
+# Setup bot using token and play game
 #
 ###############################################################################
-current_board_id = int(args.board)
+logic_controller = args.logic
+if logic_controller not in CONTROLLERS:
+    error("Invalid logic controller")
 
-if not current_board_id:
-    # List active boards to find one we can join if we haven't specified one
-    boards = board_handler.list_boards()
-    for board in boards:
-        # Try to join board
-        board_joined = False
-        current_board_id = board.id
-        success = bot_handler.join(bot.id, current_board_id)
-        if success:
-            board_joined = True
-            break
-
-    if not board_joined:
-        exit()
-else:
-    # Try to join the one we specified
-    success = bot_handler.join(bot.id, current_board_id)
-    if not success:
-        current_board_id = None
+# A bot signed in before skips recovering its token and looking up its name
+cached_bot = None
+if token_cache and args.email and not args.token:
+    cached_bot = token_cache.get(args.host, args.email)
+bot = cached_bot or sign_in()
+print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
+signed_in_at = monotonic()
+
+current_board_id = join(bot)
+if not current_board_id and cached_bot and not bot_handler.get_my_info(bot.id):
+    # The server does not know the cached token (anymore), sign in properly
+    token_cache.forget(args.host, args.email)
+    bot = sign_in()
+    signed_in_at = monotonic()
+    current_board_id = join(bot)
 
 # Did we manage to join a board?
 if not current_board_id:
-    print(
-        Fore.RED
-        + Style.BRIGHT
-        + "Error: "
-        + Style.RESET_ALL
-        + "Unable to find any boards to join"
-    )
-    exit(1)
+    error("Unable to find any boards to join")
+joined_at = monotonic()
 
-###############################################################################
-#
-# Prepare state from current board
-#
-###############################################################################
-board = board_handler.get_board(current_board_id)
-move_delay = board.minimum_delay_between_moves / 1000
+# Setup variables
+logic_class = load_controller(logic_controller)
+bot_logic: BaseLogic = logic_class()
 
 ###############################################################################
 #
 # Game play loop
 #
 ###############################################################################
-while True:
-    # Find our info among the bots on the board
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over
-        break
-
-    # Calculate next move
-    delta_x, delta_y = bot_logic.next_move(board_bot, board)
-    # delta_x, delta_y = (1, 0)
-    if not board.is_valid_move(board_bot.position, delta_x, delta_y):
-        print(
-            Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
-            "Invalid move will be ignored."
-            + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
-        )
-        sleep(1)
-        continue
-
-    try:
-        # Try to perform move
-        board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
-    except Exception as e:
-        break
+recorder = open_recorder()
+try:
+    if args.use_async:
+        import asyncio
 
-    if not board:
-        # Read new board state
-        board = board_handler.get_board(current_board_id)
+        from game.api import AsyncApi
+        from game.board_handler import AsyncBoardHandler
+        from game.bot_handler import AsyncBotHandler
+        from game.play import play_async
 
-    # Get new state
-    board_bot = board.get_bot(bot)
-    if not board_bot:
-        # Managed to get game over after move
-        break
-
-    # Don't spam the board more than it allows!
-    # sleep(move_delay * time_factor)
-    sleep(1)
+        async_api = AsyncApi(api)
+        stats = asyncio.run(
+            play_async(
+                bot,
+                current_board_id,
+                bot_logic,
+                AsyncBotHandler(async_api),
+                AsyncBoardHandler(async_api),
+                time_factor,
+                precompute=args.precompute,
+                telemetry=telemetry,
+                recorder=recorder,
+            )
+        )
+        async_api.close()
+    else:
+        stats = play(
+            bot,
+            current_board_id,
+            bot_logic,
+            bot_handler,
+            board_handler,
+            time_factor,
+            precompute=args.precompute,
+            telemetry=telemetry,
+            recorder=recorder,
+        )
+finally:
+    if recorder:
+        recorder.close()
 
 
 ###############################################################################
@@ -213,3 +379,16 @@ while True:
 #
 ###############################################################################
 print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+if stats.logic:
+    print(format_logic_stats(stats))
+print(
+    format_startup(
+        STARTED_AT,
+        {"imports": IMPORTED_AT, "sign in": signed_in_at, "join": joined_at},
+        stats,
+    )
+)
+if telemetry:
+    print(telemetry.summary())
+if args.telemetry:
+    telemetry.export(args.telemetry)
@@ -7,5 +7,4 @@
 @REM start cmd /c "python main.py --logic Awi --email=bot2@email.com --name=Awi --password=123 --team etimo"
 
 @echo off
-start cmd /c "python main.py --logic Stigam --email=bot1@email.com --name=Stigam --password=123 --team etimo"
-start cmd /c "python main.py --logic NotUnderstand --email=bot2@email.com --name=NotUnderstand --password=123 --team etimo"
+python main.py --roster bots.json
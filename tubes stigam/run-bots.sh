@@ -1,3 +1,3 @@
 #!/bin/bash
 
-python main.py --logic Stigam --email=bot1@email.com --name=Stigam --password=123 --team etimo &
\ No newline at end of file
+python main.py --roster bots.json
\ No newline at end of file
@@ -0,0 +1,74 @@
+import copy
+
+from game.board_state import BoardStore
+from game.decoder import decode_board
+
+
+def payload(objects):
+    return {
+        "id": 1,
+        "width": 10,
+        "height": 10,
+        "features": [{"name": "BotProvider", "config": {"seconds": 60}}],
+        "minimumDelayBetweenMoves": 100,
+        "gameObjects": objects,
+    }
+
+
+def diamond(id, x, y, points=1):
+    return {
+        "id": id,
+        "position": {"x": x, "y": y},
+        "type": "DiamondGameObject",
+        "properties": {"points": points},
+    }
+
+
+def bot(id, x, y, diamonds=0):
+    return {
+        "id": id,
+        "position": {"x": x, "y": y},
+        "type": "BotGameObject",
+        "properties": {"name": "bot{}".format(id), "diamonds": diamonds},
+    }
+
+
+def ids(objects):
+    return sorted(obj.id for obj in objects)
+
+
+def test_first_board_lists_everything_as_added():
+    data = payload([bot(1, 0, 0), diamond(2, 3, 3)])
+    board = BoardStore().decode(data)
+    assert board == decode_board(data)
+    assert ids(board.changes.added) == [1, 2]
+    assert board.changes.removed == board.changes.moved == board.changes.changed == []
+
+
+def test_changes_since_the_previous_board():
+    store = BoardStore()
+    first = store.decode(
+        payload([bot(1, 0, 0), bot(2, 5, 5), diamond(3, 3, 3), diamond(4, 4, 4)])
+    )
+    data = payload(
+        [bot(1, 1, 0), bot(2, 5, 5, diamonds=1), diamond(3, 3, 3), diamond(5, 7, 7)]
+    )
+    board = store.decode(data)
+
+    assert board == decode_board(data)
+    assert ids(board.changes.added) == [5]
+    assert ids(board.changes.removed) == [4]
+    assert ids(board.changes.moved) == [1]
+    assert ids(board.changes.changed) == [2]
+    # Unchanged objects and features are the very same objects
+    assert first.get_object(3) is board.get_object(3)
+    assert first.features is board.features
+    assert store.stats() == {"reused": 1, "decoded": 7}
+
+
+def test_boards_are_tracked_per_id():
+    store = BoardStore()
+    store.decode(payload([diamond(1, 0, 0)]))
+    other = copy.deepcopy(payload([diamond(1, 0, 0)]))
+    other["id"] = 2
+    assert ids(store.decode(other).changes.added) == [1]
@@ -0,0 +1,99 @@
+import random
+
+from game.logic.distance import DistanceCache, DistanceFields
+from game.models import Board, GameObject, Position, Properties
+
+WIDTH = HEIGHT = 9
+
+
+def make_board(bots, teleports) -> Board:
+    objects = [
+        GameObject(
+            id=i,
+            position=Position(y=y, x=x),
+            type="BotGameObject",
+            properties=Properties(name="bot{}".format(i)),
+        )
+        for i, (x, y) in enumerate(bots)
+    ]
+    objects += [
+        GameObject(
+            id=100 + i,
+            position=Position(y=y, x=x),
+            type="TeleportGameObject",
+            properties=Properties(pair_id="1"),
+        )
+        for i, (x, y) in enumerate(teleports)
+    ]
+    return Board(1, WIDTH, HEIGHT, [], 100, objects)
+
+
+def random_cells(rng: random.Random, count: int, taken=()):
+    cells = [(x, y) for x in range(WIDTH) for y in range(HEIGHT) if (x, y) not in taken]
+    return rng.sample(cells, count)
+
+
+def test_repaired_fields_match_a_fresh_bfs():
+    repaired = 0
+    for seed in range(40):
+        rng = random.Random(seed)
+        teleports = random_cells(rng, 2)
+        bots = random_cells(rng, 5, teleports)
+        cache = DistanceCache(max_fields=1000)
+        asked = set()
+        for _ in range(10):
+            board = make_board(bots, teleports)
+            invalidated = cache.invalidated
+            fields = cache.update(board, board.bots[0])
+            # Every field asked for before matches a fresh BFS
+            fresh = DistanceFields(board, board.bots[0])
+            misses = cache.misses
+            for x, y in asked:
+                position = Position(y=y, x=x)
+                assert fields.field_from(position) == fresh.field_from(position), seed
+                assert fields.field_to(position) == fresh.field_to(position), seed
+            # and only those the update could not repair were computed again
+            assert cache.misses - misses <= cache.invalidated - invalidated, seed
+            for x, y in random_cells(rng, 6):
+                fields.field_from(Position(y=y, x=x))
+                fields.field_to(Position(y=y, x=x))
+                asked.add((x, y))
+
+            # A few bots take a step, like between two ticks
+            for i in rng.sample(range(len(bots)), 2):
+                x, y = bots[i]
+                dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+                if 0 <= x + dx < WIDTH and 0 <= y + dy < HEIGHT:
+                    bots[i] = (x + dx, y + dy)
+        repaired += cache.repaired
+    assert repaired > 0
+
+
+def test_other_bots_block_but_can_be_tackled():
+    board = make_board([(0, 0), (1, 0)], [])
+    fields = DistanceFields(board, board.bots[0])
+    # Stepping onto the bot is fine, walking through it is not
+    assert fields.distance(Position(y=0, x=0), Position(y=0, x=1)) == 1
+    assert fields.distance(Position(y=0, x=0), Position(y=0, x=2)) == 4
+
+
+def test_teleporter_shortcut():
+    board = make_board([(0, 0)], [(1, 0), (8, 8)])
+    fields = DistanceFields(board, board.bots[0])
+    assert fields.distance(Position(y=0, x=0), Position(y=7, x=8)) == 2
+
+
+def test_fork_repairs_copies_of_the_shared_fields():
+    # The corner is walled in by two bots until one of them steps away
+    target = Position(y=0, x=0)
+    board = make_board([(8, 8), (1, 0), (0, 1)], [])
+    cache = DistanceCache()
+    before = list(cache.update(board, board.bots[0]).field_from(target))
+
+    fork = cache.fork()
+    moved = make_board([(8, 8), (1, 0), (0, 2)], [])
+    after = fork.update(moved, moved.bots[0]).field_from(target)
+    assert fork.repaired == 1 and after != before
+
+    assert cache.update(board, board.bots[0]).field_from(target) == before
+    assert cache.stats()["distance_repaired"] == 0
@@ -0,0 +1,151 @@
+import pytest
+
+from game.engine import (
+    EngineConfig,
+    GameEngine,
+    InvalidMoveError,
+    ManualClock,
+    NotOnBoardError,
+    TooFastError,
+)
+
+
+def make_engine(**config) -> GameEngine:
+    # An empty board whose diamonds and teleporters are placed by the test
+    config = {
+        "teleport_pairs": 0,
+        "diamond_button": False,
+        "min_ratio_for_generation": 0,
+        "teleport_relocation": 0,
+        **config,
+    }
+    engine = GameEngine(EngineConfig(**config), clock=ManualClock(), seed=1)
+    engine.diamonds.clear()
+    return engine
+
+
+def place(engine: GameEngine, token: str, cell, base=None):
+    engine.join(token, token)
+    bot = engine.bots[token]
+    bot.position = cell
+    bot.base = base or cell
+    return bot
+
+
+def step(engine: GameEngine, token: str, dx: int, dy: int):
+    engine.clock.advance(engine.config.minimum_delay_between_moves)
+    engine.move(token, dx, dy)
+
+
+def test_diamond_is_picked_up_and_deposited_at_base():
+    engine = make_engine()
+    bot = place(engine, "a", (0, 0))
+    engine.diamonds[(1, 0)] = (100, 2)
+
+    step(engine, "a", 1, 0)
+    assert bot.diamonds == 2
+    assert (1, 0) not in engine.diamonds
+
+    step(engine, "a", -1, 0)
+    assert (bot.diamonds, bot.score) == (0, 2)
+
+
+def test_diamond_that_does_not_fit_stays():
+    engine = make_engine(inventory_size=2)
+    bot = place(engine, "a", (0, 0), base=(5, 5))
+    bot.diamonds = 1
+    engine.diamonds[(1, 0)] = (100, 2)
+
+    step(engine, "a", 1, 0)
+    assert bot.diamonds == 1
+    assert (1, 0) in engine.diamonds
+
+
+def test_rejected_moves():
+    engine = make_engine(width=3, height=3)
+    place(engine, "a", (0, 0))
+
+    with pytest.raises(NotOnBoardError):
+        step(engine, "nobody", 1, 0)
+    with pytest.raises(InvalidMoveError):
+        step(engine, "a", 1, 1)
+    with pytest.raises(InvalidMoveError):
+        step(engine, "a", -1, 0)
+
+    step(engine, "a", 1, 0)
+    with pytest.raises(TooFastError):
+        engine.move("a", 1, 0)
+
+
+def test_tackle_takes_diamonds_and_sends_the_other_bot_home():
+    engine = make_engine()
+    tackler = place(engine, "a", (0, 0), base=(9, 9))
+    other = place(engine, "b", (1, 0), base=(5, 5))
+    other.diamonds = 3
+
+    step(engine, "a", 1, 0)
+    assert (tackler.position, tackler.diamonds) == ((1, 0), 3)
+    assert (other.position, other.diamonds) == ((5, 5), 0)
+
+
+def test_no_tackle_rejects_moving_onto_a_bot():
+    engine = make_engine(can_tackle=False)
+    place(engine, "a", (0, 0))
+    place(engine, "b", (1, 0))
+
+    with pytest.raises(InvalidMoveError):
+        step(engine, "a", 1, 0)
+
+
+def test_teleporter_lands_on_its_partner():
+    engine = make_engine()
+    bot = place(engine, "a", (0, 0))
+    engine.teleports = [(100, (1, 0)), (101, (7, 7))]
+
+    step(engine, "a", 1, 0)
+    assert bot.position == (7, 7)
+
+
+def test_button_replaces_diamonds_and_moves():
+    engine = make_engine(diamond_button=True)
+    place(engine, "a", (0, 0))
+    engine.button = (100, (1, 0))
+    engine.diamonds[(3, 3)] = (101, 1)
+
+    step(engine, "a", 1, 0)
+    assert engine.button[1] != (1, 0)
+    assert (3, 3) not in engine.diamonds or engine.diamonds[(3, 3)][0] != 101
+    assert len(engine.diamonds) == engine.diamond_target
+
+
+def test_button_stays_on_a_full_board():
+    engine = make_engine(width=2, height=2, diamond_button=True, generation_ratio=1)
+    place(engine, "a", (0, 0), base=(0, 1))
+    engine.button = (100, (1, 0))
+
+    step(engine, "a", 1, 0)
+    assert engine.button == (100, (1, 0))
+    engine.to_json()
+
+
+def test_session_end_records_the_score():
+    engine = make_engine(session_length=1)
+    bot = place(engine, "a", (0, 0))
+    bot.score = 7
+
+    engine.clock.advance(1000)
+    engine.update()
+    assert "a" not in engine.bots
+    assert engine.results == [("a", 7)]
+
+
+def test_board_matches_the_state():
+    engine = make_engine()
+    place(engine, "a", (2, 3))
+    engine.diamonds[(4, 4)] = (100, 2)
+
+    board = engine.board()
+    bot = board.bots[0]
+    assert (bot.position.x, bot.position.y) == (2, 3)
+    assert bot.properties.name == "a"
+    assert [d.properties.points for d in board.diamonds] == [2]
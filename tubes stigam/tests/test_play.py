@@ -0,0 +1,69 @@
+import asyncio
+
+from benchmarks.boards import make_board_payload
+from game.decoder import decode_board
+from game.logic.base import BaseLogic
+from game.models import Bot
+from game.play import play, play_async
+
+BOT = Bot(name="bot0", email="", id="token")
+
+
+class InvalidThenValid(BaseLogic):
+    """
+    Sends an invalid move first, then a valid one
+    """
+
+    def __init__(self):
+        self.boards = []
+
+    def next_move(self, board_bot, board):
+        self.boards.append(board)
+        if len(self.boards) == 1:
+            return 0, 0
+        return (1, 0) if board_bot.position.x + 1 < board.width else (-1, 0)
+
+
+class Handlers:
+    """
+    Serves the board once, then no board at all, and ends the game on the
+    first move sent
+    """
+
+    def __init__(self):
+        self.board = decode_board(make_board_payload())
+        self.board.minimum_delay_between_moves = 0
+        self.fetches = 0
+
+    def get_board(self, board_id):
+        self.fetches += 1
+        return self.board if self.fetches == 1 else None
+
+    def move(self, token, board_id, dx, dy):
+        raise ConnectionError("Server went away")
+
+
+class AsyncHandlers(Handlers):
+    async def get_board(self, board_id):
+        return Handlers.get_board(self, board_id)
+
+    async def move(self, token, board_id, dx, dy):
+        return Handlers.move(self, token, board_id, dx, dy)
+
+
+def test_failed_fetch_after_invalid_move_keeps_the_board():
+    handlers = Handlers()
+    logic = InvalidThenValid()
+    stats = play(BOT, 1, logic, handlers, handlers)
+
+    assert (stats.invalid_moves, stats.errors, handlers.fetches) == (1, 1, 2)
+    assert logic.boards == [handlers.board, handlers.board]
+
+
+def test_failed_fetch_after_invalid_move_keeps_the_board_async():
+    handlers = AsyncHandlers()
+    logic = InvalidThenValid()
+    stats = asyncio.run(play_async(BOT, 1, logic, handlers, handlers))
+
+    assert (stats.invalid_moves, stats.errors, handlers.fetches) == (1, 1, 2)
+    assert logic.boards == [handlers.board, handlers.board]
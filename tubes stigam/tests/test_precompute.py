@@ -0,0 +1,71 @@
+from benchmarks.boards import make_board_payload
+from game.decoder import decode_board
+from game.logic.base import BaseLogic
+from game.logic.stigam import Stigam
+from game.precompute import Precomputer, predict_board
+
+
+class Recording(BaseLogic):
+    """
+    Moves right and remembers where it was asked to move from
+    """
+
+    def __init__(self):
+        self.positions = []
+
+    def next_move(self, board_bot, board):
+        self.positions.append((board_bot.position.x, board_bot.position.y))
+        return 1, 0
+
+    def stats(self):
+        return {"decisions": len(self.positions)}
+
+
+def make_board(seed=0):
+    board = decode_board(make_board_payload(seed=seed))
+    bot = board.bots[0]
+    step = 1 if bot.position.x + 1 < board.width else -1
+    return board, bot, step
+
+
+def test_hit_adopts_the_speculative_state():
+    board, bot, step = make_board()
+    logic = Recording()
+    precomputer = Precomputer(logic)
+    precomputer.speculate(bot, board, step, 0, float("inf"))
+    expected = predict_board(board, bot, step, 0)
+    decision = precomputer.start(expected.get_object(bot.id), expected, float("inf"))
+    assert decision.future.result() == (1, 0)
+    precomputer.close()
+
+    assert logic.positions == [(bot.position.x + step, bot.position.y)]
+    assert precomputer.stats()["speculative_hits"] == 1
+
+
+def test_miss_leaves_no_trace_in_the_logic():
+    board, bot, step = make_board()
+    logic = Recording()
+    precomputer = Precomputer(logic)
+    precomputer.speculate(bot, board, step, 0, float("inf"))
+    # The move bounced: the bot is still where it was
+    precomputer.start(bot, board, float("inf")).future.result()
+    precomputer.close()
+
+    assert logic.positions == [(bot.position.x, bot.position.y)]
+    assert logic.stats() == {"decisions": 1}
+    assert precomputer.stats()["speculative_misses"] == 1
+
+
+def test_stigam_fork_leaves_the_original_alone():
+    board, bot, step = make_board()
+    speculated, untouched = Stigam(), Stigam()
+    speculated.next_move(bot, board)
+    untouched.next_move(bot, board)
+
+    predicted = predict_board(board, bot, step, 0)
+    speculated.fork().next_move(predicted.get_object(bot.id), predicted)
+
+    # The move bounced: the board stays as it was
+    assert speculated.next_move(bot, board) == untouched.next_move(bot, board)
+    assert speculated.stats() == untouched.stats()
+    assert speculated.goal_position == untouched.goal_position
@@ -0,0 +1,107 @@
+import copy
+import logging
+import os
+
+from benchmarks.boards import make_board_payload
+from game.decoder import decode_board
+from game.recording import Recorder, Recording
+
+
+def make_board(seed=0):
+    return decode_board(make_board_payload(seed=seed))
+
+
+def recorded(obj):
+    props = obj.properties
+    fields = None
+    if props:
+        fields = (
+            props.points,
+            props.pair_id,
+            props.diamonds,
+            props.score,
+            props.name,
+            props.inventory_size,
+            props.milliseconds_left,
+            props.base,
+        )
+    # Empty properties read back as None
+    if fields and not any(field is not None for field in fields):
+        fields = None
+    return obj.id, obj.type, obj.position, fields
+
+
+def read(path):
+    with Recording(path) as recording:
+        snapshots = [
+            (snapshot.session, snapshot.bot, snapshot.tick, snapshot.move, snapshot.board())
+            for snapshot in recording
+        ]
+        return snapshots, recording.complete
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "games.rec")
+    boards = [make_board(seed) for seed in range(3)]
+    recorder = Recorder(path)
+    for tick, board in enumerate(boards):
+        recorder.record("stigam", tick, board, 1, 0)
+    recorder.close()
+
+    snapshots, complete = read(path)
+    assert complete == os.path.getsize(path)
+    assert [(s[0], s[1], s[2], s[3]) for s in snapshots] == [
+        (1, "stigam", tick, (1, 0)) for tick in range(3)
+    ]
+    for (*_, board), original in zip(snapshots, boards):
+        assert (board.id, board.width, board.height) == (
+            original.id,
+            original.width,
+            original.height,
+        )
+        assert [recorded(obj) for obj in board.game_objects] == [
+            recorded(obj) for obj in original.game_objects
+        ]
+
+
+def test_torn_tail_is_cut_off_by_the_next_recorder(tmp_path):
+    path = str(tmp_path / "games.rec")
+    recorder = Recorder(path)
+    recorder.record("stigam", 0, make_board(), 0, 1)
+    recorder.record("stigam", 1, make_board(1), 0, 1)
+    recorder.close()
+    size = os.path.getsize(path)
+    os.truncate(path, size - 5)
+
+    snapshots, complete = read(path)
+    assert [s[2] for s in snapshots] == [0]
+    assert complete < size - 5
+
+    recorder = Recorder(path)
+    recorder.record("stigam", 2, make_board(2), -1, 0)
+    recorder.close()
+    snapshots, complete = read(path)
+    assert [(s[0], s[2]) for s in snapshots] == [(1, 0), (2, 2)]
+    assert complete == os.path.getsize(path)
+
+
+def test_snapshot_that_does_not_fit_is_skipped(tmp_path, caplog):
+    path = str(tmp_path / "games.rec")
+    board = make_board()
+    broken = copy.deepcopy(board)
+    broken.game_objects[0].position.x = 1 << 20
+    broken.game_objects[0].type = "NewGameObject"
+
+    recorder = Recorder(path)
+    with caplog.at_level(logging.WARNING, logger="game.recording"):
+        recorder.record("stigam", 0, broken, 1, 0)
+    recorder.record("stigam", 1, board, 1, 0)
+    recorder.close()
+
+    assert (recorder.snapshots, recorder.errors) == (1, 1)
+    assert "Not recording tick 0 of stigam" in caplog.text
+    snapshots, _ = read(path)
+    assert [s[2] for s in snapshots] == [1]
+    assert [obj.type for obj in snapshots[0][4].game_objects] == [
+        obj.type for obj in board.game_objects
+    ]
@@ -0,0 +1,45 @@
+import random
+
+from game.logic.route import MAX_EXHAUSTIVE, _tour, _two_opt, plan_route
+from game.models import GameObject, Position, Properties
+
+
+def manhattan(a, b):
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+def diamond(id, x, y):
+    return GameObject(
+        id=id,
+        position=Position(y=y, x=x),
+        type="DiamondGameObject",
+        properties=Properties(points=1),
+    )
+
+
+def test_long_tour_is_collected_without_detours():
+    # More stops than are tried in every order, along one row
+    xs = list(range(1, MAX_EXHAUSTIVE + 3))
+    random.Random(1).shuffle(xs)
+    diamonds = [diamond(i, x, 0) for i, x in enumerate(xs)]
+    # Far enough from the row that collecting all of it pays off most
+    start = base = Position(y=5, x=0)
+
+    route = plan_route(start, base, diamonds, len(xs), manhattan)
+
+    assert len(route) == len(xs)
+    order = [d.position.x for d in route]
+    assert order in (sorted(order), sorted(order, reverse=True))
+
+
+def test_two_opt_untangles_a_tour():
+    # Index 0 is the bot at x=0, stop i at x=i, the base at x=0
+    xs = range(8)
+    matrix = [[abs(a - b) for b in xs] for a in xs]
+    home = list(xs)
+    tangled = (3, 1, 2, 6, 4, 5, 7)
+
+    tour = _two_opt(tangled, matrix, home)
+
+    assert _tour(tour, matrix, home) == 14
+    assert _tour(tour, matrix, home) < _tour(tangled, matrix, home)
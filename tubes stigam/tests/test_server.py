@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from game.api import Api, MoveTooFastError
+from game.server import DIRECTIONS, create_server
+
+
+@pytest.fixture
+def api():
+    server = create_server("127.0.0.1", 0, seed=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    api = Api("http://{}:{}/api".format(host, port), retries=0)
+    yield api
+    api.close()
+    server.shutdown()
+    server.server_close()
+
+
+def test_register_recover_and_info(api):
+    bot = api.bots_register("alpha", "alpha@example.com", "secret", "team")
+    assert bot.name == "alpha"
+    # The client only accepts 201 from recover
+    assert api.bots_recover("alpha@example.com", "secret") == bot.id
+    assert api.bots_recover("alpha@example.com", "wrong") is None
+    assert api.bots_get(bot.id).name == "alpha"
+
+
+def test_register_twice_is_rejected(api):
+    assert api.bots_register("alpha", "alpha@example.com", "secret", "team")
+    assert api.bots_register("alpha", "alpha@example.com", "secret", "team") is None
+
+
+def test_join_and_move(api):
+    bot = api.bots_register("alpha", "alpha@example.com", "secret", "team")
+    assert api.bots_join(bot.id, 1)
+    assert not api.bots_join(bot.id, 2)
+
+    board = api.boards_get(1)
+    board_bot = board.get_bot(bot)
+    direction = next(
+        name
+        for name, (dx, dy) in DIRECTIONS.items()
+        if board.is_valid_move(board_bot.position, dx, dy)
+    )
+    assert api.bots_move(bot.id, direction).get_bot(bot) is not None
+    # The client recognizes the server's 403 "Move too fast"
+    with pytest.raises(MoveTooFastError):
+        api.bots_move(bot.id, direction)
+
+
+def test_status_codes():
+    server = create_server("127.0.0.1", 0, seed=1)
+    try:
+        status, bot = server.handle_api(
+            "POST",
+            ["bots"],
+            {"name": "a", "email": "a@example.com", "password": "p", "team": "t"},
+        )
+        assert status == 200
+        assert server.handle_api(
+            "POST", ["bots", "recover"], {"email": "a@example.com", "password": "p"}
+        ) == (201, {"id": bot["id"]})
+        assert server.handle_api("POST", ["bots", bot["id"], "move"], {})[0] == 403
+        assert server.handle_api("POST", ["bots", bot["id"], "join"], {"preferredBoardId": 1})[0] == 200
+        assert server.handle_api("POST", ["bots", bot["id"], "move"], {"direction": "UP"})[0] == 400
+        assert server.handle_api("GET", ["boards", "9"], {})[0] == 404
+    finally:
+        server.server_close()